@@ -1,5 +1,6 @@
 // Generated from the repo-local social style snapshot.
 // Builder: scripts/analyze_legacy_social_style.py
+// Source: docs/brand-home/content/social-style-source.json
 export const socialStyleAnalysis = {
   "summary": {
     "sourceExamples": 20,
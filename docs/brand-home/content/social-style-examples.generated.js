@@ -1,5 +1,6 @@
 // Generated from the repo-local social style snapshot.
 // Builder: scripts/import_legacy_social_style.py
+// Source: docs/brand-home/content/social-style-source.json
 export const socialStyleExamples = {
   "instagram": [
     {
@@ -142,12 +143,6 @@ export const socialStyleExamples = {
       "publishedAt": "2026-02-19T01:47:41.417701",
       "excerpt": "세상이 정해준 답안지 위에서 길을 잃었다면. 모든 가치를 전복하고 나만의 질문을 시작할 때. 니체는 이것을 삶의 주인이 되는 길이라 말했다. 나의 지도는 어디를 향하는가."
     },
-    {
-      "exampleId": "legacy-ig-04",
-      "signalId": "패스트패션",
-      "publishedAt": "2026-02-19T01:52:51.523335",
-      "excerpt": "옷은 넘쳐나지만, 나의 모습은 희미합니다. 빠르게 스쳐가는 유행 속에서 우리는 무엇을 입고, 무엇을 벗고 있는 걸까요. 잠시 옷장 앞에서 생각에 잠깁니다."
-    },
     {
       "exampleId": "legacy-ig-05",
       "signalId": "침묵의_공간",
@@ -171,6 +166,12 @@ export const socialStyleExamples = {
       "signalId": "(_라이프스타일_매거진형식_)_적정_수면",
       "publishedAt": "2026-02-19T06:39:56.937833",
       "excerpt": "수면을 숫자로 기록하고 목표를 세웁니다. 정작 깊은 휴식은 모든 것을 내려놓는 순간에 찾아오는지도 모릅니다. 다음 문장을 위한 고요한 쉼표처럼."
+    },
+    {
+      "exampleId": "legacy-ig-13",
+      "signalId": "아침과_샤워",
+      "publishedAt": "2026-02-19T07:07:13.493805",
+      "excerpt": "수증기가 공간을 채우면 세상의 형태는 잠시 지워진다. 밤의 흔적을 씻어내고 오늘의 나를 맞이하는 짧은 의식. 우리는 잠시 경계에 머문다."
     }
   ]
 };
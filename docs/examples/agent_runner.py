@@ -5,29 +5,56 @@ Flow:
 1. Fetch `AgentRunPacket` from Layer OS.
 2. Execute external work (LLM/tool call placeholder).
 3. Report terminal result back to Layer OS.
+
+The reusable pieces (pooled client, packet cache and streaming decoder,
+report spool, heartbeat, event watcher, metrics) live in `layer_os_client.py`;
+this file only wires them to a command line:
+
+- `--job-id` (repeatable) or `--job-ids-file` (`-` for stdin) runs many jobs
+  on a thread pool sized by `--concurrency`; `--watch` picks jobs up from
+  `/api/layer-os/events/stream` as they turn packet-ready.
+- `--report-batch-size` spools reports and closes them through
+  `/api/layer-os/jobs/report/batch`.
+- `--packet-cache-dir` persists the ETag packet cache; `--stream-packets`
+  decodes packets incrementally.
+- `--heartbeat-interval` sets how often a running job reports liveness.
+- `--metrics-file`/`--metrics-port` publish Prometheus metrics, and
+  `--attach-timings` adds per-phase timings to each reported `result`.
+
+Phase timings and counters go to stderr as JSON when the run ends.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
-from typing import Any, Dict
+import sys
+import tempfile
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TextIO, Union
 
 import requests
 
-
-class LayerOSAgentError(RuntimeError):
-    """Raised when packet fetch or report fails."""
+from layer_os_client import (
+    DispatchWatcher,
+    Heartbeat,
+    LayerOSAgentError,
+    LayerOSClient,
+    MetricsExporter,
+    PacketCache,
+    PreparedJob,
+    ReportBuffer,
+    RunStats,
+    StreamingPacket,
+)
 
 
 def fetch_job_packet(job_id: str, base_url: str) -> Dict[str, Any]:
-    response = requests.get(
-        f"{base_url.rstrip('/')}/api/layer-os/jobs/packet",
-        params={"job_id": job_id},
-        timeout=30,
-    )
-    response.raise_for_status()
-    return response.json()
+    with LayerOSClient(base_url) as client:
+        return client.fetch_job_packet(job_id)
 
 
 def report_job(
@@ -37,28 +64,334 @@ def report_job(
     base_url: str,
     token: str,
 ) -> Dict[str, Any]:
-    payload = {
-        "job_id": job_id,
-        "status": status,
-        "notes": result.get("notes", []),
-        "result": result,
+    with LayerOSClient(base_url, token) as client:
+        return client.report_job(job_id, status, result)
+
+
+def execute_job(job_id: str, packet: Mapping, heartbeat: Optional[Heartbeat] = None) -> Dict[str, Any]:
+    job = packet.get("job", {})
+    runtime = packet.get("runtime", {})
+    if heartbeat is not None:
+        heartbeat.progress(phase="executing")
+
+    # TODO: Replace this placeholder with a real LLM/tool execution.
+    # Example shape:
+    # - read `job["summary"]`, `job.get("payload")`
+    # - read `packet["knowledge"]` and `packet["handoff"]`, or walk them with
+    #   `packet.iter_section("knowledge")` when `packet` is a StreamingPacket
+    # - feed `heartbeat.progress(tokens=n)` as output streams in
+    # - call Claude Code / Codex / Python agent logic
+    # - collect structured output for `result`
+    return {
+        "summary": f"Stub external run completed for {job.get('job_id', job_id)}",
+        "agent": "python-example",
+        "dispatch_transport": runtime.get("dispatch_transport", "job_packet"),
+        "notes": ["stub_execution", "replace_with_real_llm_call"],
     }
-    headers = {"Content-Type": "application/json"}
-    if token.strip():
-        headers["Authorization"] = f"Bearer {token}"
-    response = requests.post(
-        f"{base_url.rstrip('/')}/api/layer-os/jobs/report",
-        headers=headers,
-        json=payload,
-        timeout=30,
-    )
-    response.raise_for_status()
-    return response.json()
+
+
+def run_job(
+    job_id: str,
+    client: LayerOSClient,
+    stats: Optional[RunStats] = None,
+    packet: Optional[Dict[str, Any]] = None,
+    reports: Optional[ReportBuffer] = None,
+    heartbeat_interval: float = 0.0,
+    attach_timings: bool = False,
+) -> Dict[str, Any]:
+    """Fetch, execute, and report one job; failures are reported as `failed`.
+
+    Pass `packet` when it was already prefetched (see `DispatchWatcher`), and
+    `reports` to spool the terminal report instead of posting it inline. A
+    running job is marked `executing` before it starts, and a positive
+    `heartbeat_interval` keeps a `Heartbeat` running while it executes; it is
+    stopped before the terminal report goes out.
+
+    Connect, fetch, and decode timings come from the client, so share one
+    `RunStats` between the two. With `attach_timings`, the job's own phase
+    timings up to the report go out under `result["timings_ms"]`.
+    """
+    stats = stats or client.stats or RunStats()
+    submit = reports.submit if reports is not None else client.report_job
+
+    with stats.job_scope() as timings:
+
+        def timed_report(status: str, result: Dict[str, Any]) -> Dict[str, Any]:
+            if attach_timings:
+                result = dict(result)
+                result["timings_ms"] = {phase: round(seconds * 1000, 2) for phase, seconds in timings.items()}
+            with stats.timer("report"):
+                return submit(job_id, status, result)
+
+        try:
+            if packet is None:
+                if client.stream_packets:
+                    packet = client.open_job_packet(job_id)
+                else:
+                    packet = client.fetch_job_packet(job_id)
+            heartbeat = Heartbeat(client, job_id, packet.get("job") or {}, heartbeat_interval)
+            try:
+                with heartbeat, stats.timer("execute"):
+                    result = execute_job(job_id, packet, heartbeat)
+            finally:
+                if isinstance(packet, StreamingPacket):
+                    packet.close()
+            report = timed_report("succeeded", result)
+            stats.record_outcome("succeeded")
+            return report
+        except requests.HTTPError as exc:
+            error_text = exc.response.text if exc.response is not None else str(exc)
+            failed_result = {
+                "error": "http_error",
+                "details": error_text,
+                "notes": ["http_error"],
+            }
+            try:
+                report = timed_report("failed", failed_result)
+            except Exception as report_exc:  # pragma: no cover - best-effort failure path
+                raise LayerOSAgentError(f"failed to report HTTP error: {report_exc}") from exc
+            stats.record_outcome("failed")
+            return report
+        except Exception as exc:
+            failed_result = {
+                "error": exc.__class__.__name__,
+                "details": str(exc),
+                "notes": ["agent_exception"],
+            }
+            try:
+                report = timed_report("failed", failed_result)
+            except Exception as report_exc:  # pragma: no cover - best-effort failure path
+                raise LayerOSAgentError(f"failed to report agent exception: {report_exc}") from exc
+            stats.record_outcome("failed")
+            return report
+
+
+def run_worker_pool(
+    job_ids: Iterable[Union[str, PreparedJob]],
+    client: LayerOSClient,
+    concurrency: int,
+    on_report: Callable[[str, Dict[str, Any]], None],
+    stats: Optional[RunStats] = None,
+    reports: Optional[ReportBuffer] = None,
+    heartbeat_interval: float = 0.0,
+    attach_timings: bool = False,
+) -> RunStats:
+    """Drain `job_ids` on a bounded thread pool.
+
+    At most `concurrency` jobs are in flight; the iterator is consumed lazily so
+    a stdin queue is never read further ahead than the pool can absorb. Items
+    may be plain job ids or `PreparedJob`s that already carry their packet.
+    """
+    stats = stats or client.stats or RunStats()
+    concurrency = max(1, concurrency)
+    slots = threading.BoundedSemaphore(concurrency)
+
+    def finish(job_id: str, future: Future) -> None:
+        try:
+            on_report(job_id, future.result())
+        except Exception as exc:
+            stats.record_error()
+            on_report(job_id, {"job_id": job_id, "error": exc.__class__.__name__, "details": str(exc)})
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="layer-os-job") as pool:
+        for item in job_ids:
+            job_id, packet = (item.job_id, item.packet) if isinstance(item, PreparedJob) else (item, None)
+            slots.acquire()
+            future = pool.submit(
+                run_job, job_id, client, stats, packet, reports, heartbeat_interval, attach_timings
+            )
+            future.add_done_callback(lambda done, job_id=job_id: finish(job_id, done))
+    return stats
+
+
+def iter_job_ids(stream: TextIO) -> Iterator[str]:
+    for line in stream:
+        job_id = line.strip()
+        if job_id and not job_id.startswith("#"):
+            yield job_id
+
+
+def run_queue(args: argparse.Namespace, client: LayerOSClient) -> None:
+    output_lock = threading.Lock()
+
+    def emit(job_id: str, report: Dict[str, Any]) -> None:
+        with output_lock:
+            print(json.dumps(report, ensure_ascii=False), flush=True)
+
+    def emit_unspooled(job_id: str, report: Dict[str, Any]) -> None:
+        # Spooled reports are printed once, when the flusher delivers them.
+        if not report.get("spooled"):
+            emit(job_id, report)
+
+    reports: Optional[ReportBuffer] = None
+    if args.report_batch_size > 0:
+        reports = ReportBuffer(
+            client,
+            Path(args.report_spool).expanduser(),
+            max_batch=args.report_batch_size,
+            flush_interval=args.report_flush_interval,
+            on_delivered=lambda item: emit(str(item.get("job_id", "")), item),
+        )
+
+    def queued_job_ids() -> Iterator[str]:
+        yield from args.job_id
+        if args.job_ids_file == "-":
+            yield from iter_job_ids(sys.stdin)
+        elif args.job_ids_file:
+            with open(args.job_ids_file, encoding="utf-8") as handle:
+                yield from iter_job_ids(handle)
+
+    watcher: Optional[DispatchWatcher] = None
+    stats = client.stats or RunStats()
+    exporter: Optional[MetricsExporter] = None
+    if args.metrics_file or args.metrics_port:
+        exporter = MetricsExporter(
+            stats,
+            Path(args.metrics_file).expanduser() if args.metrics_file else None,
+            args.metrics_port,
+            args.metrics_interval,
+        ).start()
+    try:
+        if args.watch:
+            watcher = DispatchWatcher(client, args.roles.split(","), prefetch_workers=args.concurrency).start()
+            run_worker_pool(
+                watcher, client, args.concurrency, emit_unspooled, stats, reports, args.heartbeat_interval, args.attach_timings
+            )
+        else:
+            run_worker_pool(
+                queued_job_ids(),
+                client,
+                args.concurrency,
+                emit_unspooled,
+                stats,
+                reports,
+                args.heartbeat_interval,
+                args.attach_timings,
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        if reports is not None:
+            reports.close()
+        if exporter is not None:
+            exporter.stop()
+    summary = stats.summary()
+    if reports is not None:
+        summary["reports_spooled"] = reports.pending()
+    print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Layer OS external agent runner example")
-    parser.add_argument("--job-id", required=True, help="Layer OS job id")
+    parser.add_argument(
+        "--job-id",
+        action="append",
+        default=[],
+        help="Layer OS job id; repeat to run several jobs in one process",
+    )
+    parser.add_argument(
+        "--job-ids-file",
+        help="file with one job id per line, or `-` to read a queue from stdin",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="follow the daemon event stream and run jobs as soon as they are packet-ready",
+    )
+    parser.add_argument(
+        "--roles",
+        default="",
+        help="comma-separated job roles to pick up in --watch mode (default: all)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="maximum jobs in flight in multi-job mode (default: 4)",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="keep-alive connections kept per daemon host (default: --concurrency)",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=4,
+        help="attempts per daemon call before giving up on 5xx/connection errors (default: 4)",
+    )
+    parser.add_argument(
+        "--retry-base-delay",
+        type=float,
+        default=0.15,
+        help="base seconds for jittered exponential retry backoff (default: 0.15)",
+    )
+    parser.add_argument(
+        "--report-batch-size",
+        type=int,
+        default=0,
+        help="spool reports and flush them via /jobs/report/batch in groups of N, at most 200 (default: off)",
+    )
+    parser.add_argument(
+        "--report-flush-interval",
+        type=float,
+        default=0.5,
+        help="seconds a spooled report may wait before a partial batch is flushed (default: 0.5)",
+    )
+    parser.add_argument(
+        "--report-spool",
+        default=str(Path(tempfile.gettempdir()) / "layer-os-report-spool.jsonl"),
+        help="durable JSONL spool for undelivered reports",
+    )
+    parser.add_argument(
+        "--packet-cache-size",
+        type=int,
+        default=256,
+        help="job packets kept in memory for ETag revalidation; 0 disables the cache (default: 256)",
+    )
+    parser.add_argument(
+        "--packet-cache-dir",
+        default="",
+        help="directory for an on-disk packet cache shared across runs (default: memory only)",
+    )
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=float,
+        default=15.0,
+        help="seconds between /jobs/update liveness beats while a job executes; 0 sends only the claim beat (default: 15)",
+    )
+    parser.add_argument(
+        "--attach-timings",
+        action="store_true",
+        help="add per-phase timings_ms (connect/fetch/decode/execute) to each reported result",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default="",
+        help="rewrite a Prometheus text-format metrics file while running and at exit",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        help="serve Prometheus metrics on 127.0.0.1:<port>/metrics (default: off)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="seconds between --metrics-file rewrites (default: 10)",
+    )
+    parser.add_argument(
+        "--stream-packets",
+        action="store_true",
+        help="decode job packets incrementally so work starts before knowledge/handoff arrive",
+    )
     parser.add_argument(
         "--base-url",
         required=True,
@@ -70,50 +403,41 @@ def main() -> None:
         help="Write token value for Authorization: Bearer <token>",
     )
     args = parser.parse_args()
+    if not args.job_id and not args.job_ids_file and not args.watch:
+        parser.error("one of --job-id, --job-ids-file, or --watch is required")
+    if args.watch and (args.job_id or args.job_ids_file):
+        parser.error("--watch cannot be combined with --job-id or --job-ids-file")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
 
-    try:
-        packet = fetch_job_packet(args.job_id, args.base_url)
-
-        job = packet.get("job", {})
-        runtime = packet.get("runtime", {})
-
-        # TODO: Replace this placeholder with a real LLM/tool execution.
-        # Example shape:
-        # - read `job["summary"]`, `job.get("payload")`
-        # - read `packet["knowledge"]` and `packet["handoff"]`
-        # - call Claude Code / Codex / Python agent logic
-        # - collect structured output for `result`
-        result = {
-            "summary": f"Stub external run completed for {job.get('job_id', args.job_id)}",
-            "agent": "python-example",
-            "dispatch_transport": runtime.get("dispatch_transport", "job_packet"),
-            "notes": ["stub_execution", "replace_with_real_llm_call"],
-        }
-        report = report_job(args.job_id, "succeeded", result, args.base_url, args.token)
-        print(json.dumps(report, ensure_ascii=False, indent=2))
-    except requests.HTTPError as exc:
-        error_text = exc.response.text if exc.response is not None else str(exc)
-        failed_result = {
-            "error": "http_error",
-            "details": error_text,
-            "notes": ["http_error"],
-        }
-        try:
-            report = report_job(args.job_id, "failed", failed_result, args.base_url, args.token)
-            print(json.dumps(report, ensure_ascii=False, indent=2))
-        except Exception as report_exc:  # pragma: no cover - best-effort failure path
-            raise LayerOSAgentError(f"failed to report HTTP error: {report_exc}") from exc
-    except Exception as exc:
-        failed_result = {
-            "error": exc.__class__.__name__,
-            "details": str(exc),
-            "notes": ["agent_exception"],
-        }
-        try:
-            report = report_job(args.job_id, "failed", failed_result, args.base_url, args.token)
+    packet_cache = None
+    if args.packet_cache_size > 0:
+        packet_cache = PacketCache(
+            args.packet_cache_size,
+            disk_dir=Path(args.packet_cache_dir) if args.packet_cache_dir else None,
+        )
+    client = LayerOSClient(
+        args.base_url,
+        args.token,
+        pool_size=args.pool_size or args.concurrency,
+        max_attempts=args.max_attempts,
+        retry_base_delay=args.retry_base_delay,
+        packet_cache=packet_cache,
+        stream_packets=args.stream_packets,
+        stats=RunStats(),
+    )
+    with client:
+        single = len(args.job_id) == 1 and not args.job_ids_file and not args.watch
+        if single and args.report_batch_size <= 0 and not args.metrics_file and not args.metrics_port:
+            report = run_job(
+                args.job_id[0],
+                client,
+                heartbeat_interval=args.heartbeat_interval,
+                attach_timings=args.attach_timings,
+            )
             print(json.dumps(report, ensure_ascii=False, indent=2))
-        except Exception as report_exc:  # pragma: no cover - best-effort failure path
-            raise LayerOSAgentError(f"failed to report agent exception: {report_exc}") from exc
+            return
+        run_queue(args, client)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""Throughput/latency benchmark for `agent_runner.py` against a stand-in daemon.
+
+A local `ThreadingHTTPServer` plays the daemon's job packet/report surface
+(`/jobs/packet`, `/jobs/report`, `/jobs/report/batch`). Packet size, response
+latency, and the share of injected 503s are configurable. The runner's own
+`run_worker_pool` then drains a fresh batch of jobs at each concurrency level
+and the per-level `RunStats` summaries form the throughput/latency curve.
+
+    python3 docs/examples/agent_runner_bench.py --levels 1,4,16,64 --packet-kb 64 --latency-ms 5
+
+The table goes to stderr and the full JSON result to stdout. To catch client
+regressions before a deploy, save a run with `--output baseline.json` and later
+pass `--baseline baseline.json`. The exit status is 1 when any shared level's
+throughput drops more than `--tolerance` below the baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from agent_runner import run_worker_pool
+from layer_os_client import LayerOSClient, ReportBuffer, RunStats
+
+
+class StandInDaemon:
+    """In-process fake of the daemon's packet and report routes."""
+
+    def __init__(
+        self,
+        packet_kb: int = 16,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.statuses: Dict[str, str] = {}
+        self.requests = 0
+        self.injected_errors = 0
+        self._lock = threading.Lock()
+        lesson = {"lesson_id": "", "summary": "x" * 200, "tags": ["bench", "stand-in"]}
+        lessons = max(1, packet_kb * 1024 // len(json.dumps(lesson)))
+        self.knowledge = {
+            "current_focus": "benchmark",
+            "next_steps": ["drain the queue"],
+            "corpus_lessons": [dict(lesson, lesson_id=f"lesson_{index:05d}") for index in range(lessons)],
+        }
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInDaemon":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stand-in-daemon", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def seed_jobs(self, job_ids: List[str]) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                self.statuses[job_id] = "running"
+
+    def packet(self, job_id: str) -> Dict[str, Any]:
+        return {
+            "source": "stand-in",
+            "job": {"job_id": job_id, "status": self.statuses.get(job_id, ""), "role": "planner", "notes": []},
+            "runtime": {"dispatch_transport": "job_packet", "report_path": "/api/layer-os/jobs/report"},
+            "prompting": {"mutation_policy": "read_only"},
+            "knowledge": self.knowledge,
+        }
+
+    def _pause_or_fail(self) -> bool:
+        """Sleep the injected latency; return True when this request should 503."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.injected_errors += 1
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return fail
+
+    def _report(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = str(payload.get("job_id", ""))
+        status = str(payload.get("status", ""))
+        with self._lock:
+            previous = self.statuses.get(job_id)
+            if previous is None:
+                return {"job_id": job_id, "outcome": "rejected", "error": "job_id not found"}
+            self.statuses[job_id] = status
+        outcome = "duplicate" if previous == status else "reported"
+        return {"job_id": job_id, "outcome": outcome, "job": {"job_id": job_id, "status": status}}
+
+    def _handler(self) -> type:
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; like Go's net/http,
+            # set TCP_NODELAY so they don't stall behind delayed ACKs.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *_args: Any) -> None:
+                pass
+
+            def send_json(self, status: int, payload: Any, etag: str = "") -> None:
+                body = b"" if status == 304 else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_json(self) -> Any:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path != "/api/layer-os/jobs/packet":
+                    self.send_json(404, {"error": "not found"})
+                    return
+                if daemon._pause_or_fail():
+                    self.send_json(503, {"error": "injected failure"})
+                    return
+                job_id = parse_qs(url.query).get("job_id", [""])[0]
+                if job_id not in daemon.statuses:
+                    self.send_json(400, {"error": "job_id not found"})
+                    return
+                packet = daemon.packet(job_id)
+                etag = 'W/"' + hashlib.sha256(json.dumps(packet["job"]).encode()).hexdigest()[:32] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_json(304, None, etag)
+                    return
+                self.send_json(200, packet, etag)
+
+            def do_POST(self) -> None:
+                path = urlparse(self.path).path
+                payload = self.read_json()
+                if path not in ("/api/layer-os/jobs/report", "/api/layer-os/jobs/report/batch", "/api/layer-os/jobs/update"):
+                    self.send_json(404, {"error": "not found"})
+                    return
+                if daemon._pause_or_fail():
+                    self.send_json(503, {"error": "injected failure"})
+                    return
+                if path.endswith("/update"):
+                    job_id = str(payload.get("job_id", ""))
+                    self.send_json(200, {"job": {"job_id": job_id, "status": daemon.statuses.get(job_id, "")}})
+                    return
+                if path.endswith("/batch"):
+                    self.send_json(200, {"items": [daemon._report(item) for item in payload.get("reports", [])]})
+                    return
+                item = daemon._report(payload)
+                if item["outcome"] == "rejected":
+                    self.send_json(400, {"error": item["error"]})
+                    return
+                self.send_json(200, {"job": item["job"]})
+
+        return Handler
+
+
+def run_level(
+    daemon: StandInDaemon,
+    concurrency: int,
+    jobs: int,
+    args: argparse.Namespace,
+    spool_dir: Path,
+) -> Dict[str, Any]:
+    job_ids = [f"bench_c{concurrency:03d}_{index:05d}" for index in range(jobs)]
+    daemon.seed_jobs(job_ids)
+    requests_before = daemon.requests
+    errors_before = daemon.injected_errors
+    stats = RunStats()
+    reports: Optional[ReportBuffer] = None
+    with LayerOSClient(
+        daemon.base_url,
+        pool_size=concurrency,
+        stream_packets=args.stream_packets,
+        retry_base_delay=args.retry_base_delay,
+        stats=stats,
+    ) as client:
+        if args.report_batch_size > 0:
+            spool = spool_dir / f"bench-spool-{concurrency}.jsonl"
+            spool.unlink(missing_ok=True)
+            reports = ReportBuffer(client, spool, max_batch=args.report_batch_size, flush_interval=0.05)
+        try:
+            run_worker_pool(iter(job_ids), client, concurrency, lambda _job_id, _report: None, stats, reports)
+        finally:
+            if reports is not None:
+                reports.close()
+    summary = stats.summary()
+    unreported = sum(1 for job_id in job_ids if daemon.statuses.get(job_id) == "running")
+    return {
+        "concurrency": concurrency,
+        "jobs": summary["jobs"],
+        "failed": summary["failed"],
+        "errors": summary["errors"],
+        "unreported": unreported,
+        "elapsed_seconds": summary["elapsed_seconds"],
+        "jobs_per_second": summary["jobs_per_second"],
+        "phase_ms": summary["phase_ms"],
+        "counters": summary["counters"],
+        "daemon_requests": daemon.requests - requests_before,
+        "injected_errors": daemon.injected_errors - errors_before,
+    }
+
+
+def render_table(levels: List[Dict[str, Any]]) -> str:
+    peak = max((level["jobs_per_second"] for level in levels), default=0.0) or 1.0
+    header = f"{'conc':>5} {'jobs/s':>9} {'fetch p50':>10} {'fetch p99':>10} {'report p50':>11} {'report p99':>11} {'retries':>8}  curve"
+    lines = [header, "-" * len(header)]
+    for level in levels:
+        phases = level["phase_ms"]
+        fetch = phases.get("fetch", {})
+        report = phases.get("report", {})
+        bar = "#" * max(1, round(level["jobs_per_second"] / peak * 30))
+        lines.append(
+            f"{level['concurrency']:>5} {level['jobs_per_second']:>9.1f} "
+            f"{fetch.get('p50', 0):>10.2f} {fetch.get('p99', 0):>10.2f} "
+            f"{report.get('p50', 0):>11.2f} {report.get('p99', 0):>11.2f} "
+            f"{level['counters'].get('retries', 0):>8}  {bar}"
+        )
+    return "\n".join(lines)
+
+
+def compare_to_baseline(levels: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    expected = {level["concurrency"]: level["jobs_per_second"] for level in baseline.get("levels", [])}
+    regressions = []
+    for level in levels:
+        before = expected.get(level["concurrency"])
+        if before and level["jobs_per_second"] < before * (1 - tolerance):
+            regressions.append(
+                f"concurrency {level['concurrency']}: {level['jobs_per_second']:.1f} jobs/s "
+                f"vs baseline {before:.1f} (-{(1 - level['jobs_per_second'] / before) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark agent_runner.py against a local stand-in daemon")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="comma-separated concurrency levels (default: 1,2,4,8,16,32)")
+    parser.add_argument("--jobs", type=int, default=200, help="jobs drained per level (default: 200)")
+    parser.add_argument("--packet-kb", type=int, default=16, help="approximate knowledge payload per packet in KiB (default: 16)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed latency added to every daemon response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform random latency added on top of --latency-ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of daemon responses replaced by 503 (0-1)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for injected latency/errors")
+    parser.add_argument("--retry-base-delay", type=float, default=0.01, help="client retry backoff base in seconds (default: 0.01)")
+    parser.add_argument("--stream-packets", action="store_true", help="benchmark the streaming packet decoder")
+    parser.add_argument("--report-batch-size", type=int, default=0, help="benchmark spooled batch reports of this size")
+    parser.add_argument("--output", default="", help="also write the JSON result to this path")
+    parser.add_argument("--baseline", default="", help="JSON result from an earlier run to compare throughput against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop vs baseline (default: 0.2)")
+    args = parser.parse_args()
+    try:
+        levels = [int(value) for value in args.levels.split(",") if value.strip()]
+    except ValueError:
+        parser.error("--levels must be comma-separated integers")
+    if not levels or min(levels) < 1:
+        parser.error("--levels needs at least one concurrency >= 1")
+
+    daemon = StandInDaemon(args.packet_kb, args.latency_ms, args.jitter_ms, args.error_rate, args.seed).start()
+    spool_dir = Path(tempfile.gettempdir())
+    try:
+        results = [run_level(daemon, concurrency, args.jobs, args, spool_dir) for concurrency in levels]
+    finally:
+        daemon.stop()
+
+    payload = {
+        "config": {
+            "jobs": args.jobs,
+            "packet_kb": args.packet_kb,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "stream_packets": args.stream_packets,
+            "report_batch_size": args.report_batch_size,
+        },
+        "levels": results,
+    }
+    print(render_table(results), file=sys.stderr)
+    print(json.dumps(payload, ensure_ascii=False, indent=2))
+    if args.output:
+        Path(args.output).expanduser().write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    failures = [f"concurrency {level['concurrency']}: {level['unreported']} jobs never reported" for level in results if level["unreported"]]
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).expanduser().read_text(encoding="utf-8"))
+        failures += compare_to_baseline(results, baseline, args.tolerance)
+    for failure in failures:
+        print(f"regression: {failure}", file=sys.stderr)
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""asyncio-native Layer OS client for agents that keep many jobs in flight.
+
+`agent_runner.py` spends one thread per job. This client keeps every job on a
+single event loop instead: requests share a bounded keep-alive connection pool,
+each call takes its own deadline, and cancelling a task abandons its request
+without poisoning the pool. The transport uses only the standard library;
+retry and report helpers are shared with `layer_os_client.py`.
+
+Covered endpoints: `/jobs` (list/create), `/jobs/dispatch`, `/jobs/packet`,
+`/jobs/update`, `/jobs/report`, and `/knowledge/search`.
+
+    async with AsyncLayerOSClient("http://127.0.0.1:17808", token) as client:
+        packet = await client.fetch_job_packet("job_001", timeout=5)
+        await client.report_job("job_001", "succeeded", {"summary": "done"})
+
+Run as a script to drive a list of jobs through the stub executor with
+`--concurrency` of them in flight at once.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import ssl
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from layer_os_client import RETRYABLE_STATUS, backoff_delay, report_payload
+
+
+class LayerOSAsyncError(RuntimeError):
+    pass
+
+
+class LayerOSHTTPError(LayerOSAsyncError):
+    def __init__(self, method: str, path: str, status: int, body: bytes) -> None:
+        self.status = status
+        self.body = body
+        detail = body.decode("utf-8", errors="replace").strip()
+        super().__init__(f"{method} {path} -> HTTP {status}: {detail}")
+
+
+class Response:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+class _Connection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """At most `max_connections` HTTP/1.1 connections to one origin.
+
+    Idle connections are reused LIFO, so a burst warms a few sockets rather
+    than spreading requests thinly across all of them.
+    """
+
+    def __init__(self, host: str, port: int, ssl_context: Optional[ssl.SSLContext], max_connections: int) -> None:
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self._slots = asyncio.Semaphore(max(1, max_connections))
+        self._idle: Deque[_Connection] = deque()
+        self._closed = False
+
+    async def acquire(self, fresh: bool = False) -> Tuple[_Connection, bool]:
+        """Return a connection and whether it was reused from the idle set."""
+        await self._slots.acquire()
+        try:
+            while self._idle and not fresh:
+                conn = self._idle.pop()
+                if not conn.reader.at_eof() and not conn.writer.is_closing():
+                    return conn, True
+                conn.close()
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl_context)
+            return _Connection(reader, writer), False
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: _Connection, reusable: bool) -> None:
+        if reusable and not self._closed:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    async def aclose(self) -> None:
+        self._closed = True
+        while self._idle:
+            conn = self._idle.pop()
+            conn.close()
+            try:
+                await conn.writer.wait_closed()
+            except OSError:
+                pass
+
+
+class AsyncLayerOSClient:
+    """Job and knowledge endpoints over a pooled asyncio HTTP/1.1 transport.
+
+    `timeout` is the default per-call deadline in seconds, covering the
+    connection wait, retries, and backoff; every method accepts `timeout=` to
+    override it. GETs retry 5xx and connection failures with jittered
+    backoff. `report_job` retries too, but first re-reads the packet so a
+    report that landed before its reply was lost is not sent twice. Other
+    writes are sent once.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str = "",
+        *,
+        max_connections: int = 100,
+        timeout: float = 30.0,
+        max_attempts: int = 4,
+        retry_base_delay: float = 0.15,
+        retry_max_delay: float = 5.0,
+    ) -> None:
+        parts = urlsplit(base_url.rstrip("/"))
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported Layer OS base URL: {base_url!r}")
+        secure = parts.scheme == "https"
+        self.base_path = parts.path
+        self.host_header = parts.netloc
+        self.token = token
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.pool = ConnectionPool(
+            parts.hostname,
+            parts.port or (443 if secure else 80),
+            ssl.create_default_context() if secure else None,
+            max_connections,
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+    async def __aenter__(self) -> "AsyncLayerOSClient":
+        return self
+
+    async def __aexit__(self, *_exc: Any) -> None:
+        await self.aclose()
+
+    async def list_jobs(self, status: str = "", limit: int = 0, *, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {}
+        if status:
+            params["status"] = status
+        if limit > 0:
+            params["limit"] = limit
+        response = await self.request("GET", "/api/layer-os/jobs", params=params, timeout=timeout)
+        return response.json().get("items", [])
+
+    async def create_job(self, job: Dict[str, Any], *, timeout: Optional[float] = None) -> Dict[str, Any]:
+        response = await self.request("POST", "/api/layer-os/jobs", body=job, timeout=timeout)
+        return response.json()
+
+    async def dispatch_job(self, job_id: str, *, timeout: Optional[float] = None) -> Dict[str, Any]:
+        response = await self.request("POST", "/api/layer-os/jobs/dispatch", body={"job_id": job_id}, timeout=timeout)
+        return response.json()
+
+    async def fetch_job_packet(self, job_id: str, *, timeout: Optional[float] = None) -> Dict[str, Any]:
+        response = await self.request("GET", "/api/layer-os/jobs/packet", params={"job_id": job_id}, timeout=timeout)
+        return response.json()
+
+    async def update_job(
+        self,
+        job_id: str,
+        status: str,
+        notes: Optional[List[str]] = None,
+        result: Optional[Dict[str, Any]] = None,
+        *,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Post one `/jobs/update`; notes are replaced, and so is result unless it is None."""
+        body = {"job_id": job_id, "status": status, "notes": notes or [], "result": result}
+        response = await self.request("POST", "/api/layer-os/jobs/update", body=body, timeout=timeout)
+        return response.json()
+
+    async def report_job(
+        self,
+        job_id: str,
+        status: str,
+        result: Dict[str, Any],
+        *,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        payload = report_payload(job_id, status, result)
+
+        async def attempt_report() -> Dict[str, Any]:
+            for attempt in range(1, self.max_attempts + 1):
+                if attempt > 1:
+                    landed = await self._report_already_landed(job_id, status)
+                    if landed is not None:
+                        return landed
+                try:
+                    response = await self._send("POST", "/api/layer-os/jobs/report", None, payload)
+                except (OSError, asyncio.IncompleteReadError):
+                    if attempt == self.max_attempts:
+                        raise
+                else:
+                    if response.status not in RETRYABLE_STATUS or attempt == self.max_attempts:
+                        return self._checked("POST", "/api/layer-os/jobs/report", response).json()
+                await asyncio.sleep(backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay))
+            raise LayerOSAsyncError(f"report for {job_id} exhausted retries")  # pragma: no cover - loop always returns
+
+        return await asyncio.wait_for(attempt_report(), self._deadline(timeout))
+
+    async def search_knowledge(self, query: str, *, timeout: Optional[float] = None) -> Dict[str, Any]:
+        response = await self.request("GET", "/api/layer-os/knowledge/search", params={"q": query}, timeout=timeout)
+        return response.json()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Any] = None,
+        timeout: Optional[float] = None,
+    ) -> Response:
+        """Send one call under a deadline; raises `LayerOSHTTPError` on non-2xx."""
+        return await asyncio.wait_for(self._request_with_retry(method, path, params, body), self._deadline(timeout))
+
+    def _deadline(self, timeout: Optional[float]) -> Optional[float]:
+        deadline = self.timeout if timeout is None else timeout
+        return deadline if deadline > 0 else None
+
+    async def _request_with_retry(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        body: Optional[Any],
+    ) -> Response:
+        attempts = self.max_attempts if method == "GET" else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                response = await self._send(method, path, params, body)
+            except (OSError, asyncio.IncompleteReadError):
+                if attempt == attempts:
+                    raise
+            else:
+                if response.status not in RETRYABLE_STATUS or attempt == attempts:
+                    return self._checked(method, path, response)
+            await asyncio.sleep(backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay))
+        raise LayerOSAsyncError(f"{method} {path} exhausted retries")  # pragma: no cover - loop always returns
+
+    async def _report_already_landed(self, job_id: str, status: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self._send("GET", "/api/layer-os/jobs/packet", {"job_id": job_id}, None)
+        except (OSError, asyncio.IncompleteReadError):
+            return None
+        if response.status != 200:
+            return None
+        job = (response.json() or {}).get("job", {})
+        if job.get("status") != status:
+            return None
+        return {"job": job, "warnings": ["report_confirmed_after_retry"]}
+
+    @staticmethod
+    def _checked(method: str, path: str, response: Response) -> Response:
+        if response.status >= 300 and response.status != 304:
+            raise LayerOSHTTPError(method, path, response.status, response.body)
+        return response
+
+    async def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        body: Optional[Any],
+    ) -> Response:
+        target = self.base_path + path
+        if params:
+            target += "?" + urlencode(params)
+        payload = b""
+        headers = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {self.host_header}",
+            "Accept: application/json",
+        ]
+        if body is not None:
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            headers.append("Content-Type: application/json")
+        if method != "GET":
+            headers.append(f"Content-Length: {len(payload)}")
+            if self.token:
+                headers.append(f"Authorization: Bearer {self.token}")
+        head = ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1")
+
+        fresh = False
+        while True:
+            conn, reused = await self.pool.acquire(fresh)
+            reusable = False
+            try:
+                conn.writer.write(head + payload)
+                await conn.writer.drain()
+                response, reusable = await self._read_response(conn.reader, method)
+                return response
+            except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                # The daemon may close an idle keep-alive socket just as we reuse
+                # it. Nothing was answered, so resend once on a new connection.
+                partial = getattr(exc, "partial", b"")
+                if not reused or partial:
+                    raise
+                fresh = True
+            finally:
+                # A cancelled or failed exchange leaves the socket mid-message; drop it.
+                self.pool.release(conn, reusable)
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader, method: str) -> Tuple[Response, bool]:
+        try:
+            return await AsyncLayerOSClient._read_message(reader, method)
+        except asyncio.LimitOverrunError as exc:
+            # A header or chunk-size line outgrew the stream buffer (64 KiB by default).
+            raise LayerOSAsyncError("response line exceeds the stream buffer limit") from exc
+
+    @staticmethod
+    async def _read_message(reader: asyncio.StreamReader, method: str) -> Tuple[Response, bool]:
+        raw_head = await reader.readuntil(b"\r\n\r\n")
+        lines = raw_head.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/1."):
+            raise LayerOSAsyncError(f"malformed status line: {lines[0]!r}")
+        status = int(parts[1])
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close" and parts[0] != "HTTP/1.0"
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return Response(status, headers, b""), keep_alive
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks: List[bytes] = []
+            while True:
+                size_line = await reader.readuntil(b"\r\n")
+                size = int(size_line.split(b";", 1)[0].strip(), 16)
+                if size == 0:
+                    while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            return Response(status, headers, b"".join(chunks)), keep_alive
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+            return Response(status, headers, body), keep_alive
+        return Response(status, headers, await reader.read()), False
+
+
+async def execute_job(job_id: str, packet: Dict[str, Any]) -> Dict[str, Any]:
+    job = packet.get("job", {})
+    runtime = packet.get("runtime", {})
+
+    # TODO: Replace this placeholder with a real async LLM/tool call.
+    await asyncio.sleep(0)
+    return {
+        "summary": f"Stub external run completed for {job.get('job_id', job_id)}",
+        "agent": "python-async-example",
+        "dispatch_transport": runtime.get("dispatch_transport", "job_packet"),
+        "notes": ["stub_execution", "replace_with_real_llm_call"],
+    }
+
+
+async def run_job(
+    client: AsyncLayerOSClient,
+    job_id: str,
+    execute: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]] = execute_job,
+    *,
+    job_timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Fetch, execute, and report one job; failures are reported as `failed`."""
+    try:
+        packet = await client.fetch_job_packet(job_id)
+        result = await asyncio.wait_for(execute(job_id, packet), job_timeout)
+        return await client.report_job(job_id, "succeeded", result)
+    except asyncio.CancelledError:
+        raise
+    except LayerOSHTTPError as exc:
+        failed_result = {
+            "error": "http_error",
+            "details": exc.body.decode("utf-8", errors="replace"),
+            "notes": ["http_error"],
+        }
+    except Exception as exc:
+        failed_result = {
+            "error": exc.__class__.__name__,
+            "details": str(exc),
+            "notes": ["agent_exception"],
+        }
+    return await client.report_job(job_id, "failed", failed_result)
+
+
+async def run_jobs(
+    client: AsyncLayerOSClient,
+    job_ids: Iterable[str],
+    concurrency: int,
+    execute: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]] = execute_job,
+    *,
+    job_timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Run jobs with at most `concurrency` in flight, returning reports in input order.
+
+    `concurrency` workers drain a queue of the same size, so only that many
+    job ids are pending at once and `job_ids` may be a lazy iterator.
+    """
+    workers = max(1, concurrency)
+    pending: asyncio.Queue[Optional[Tuple[int, str]]] = asyncio.Queue(workers)
+    reports: Dict[int, Dict[str, Any]] = {}
+
+    async def worker() -> None:
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            index, job_id = item
+            try:
+                reports[index] = await run_job(client, job_id, execute, job_timeout=job_timeout)
+            except Exception as exc:
+                reports[index] = {"job_id": job_id, "error": f"{exc.__class__.__name__}: {exc}"}
+
+    tasks = [asyncio.ensure_future(worker()) for _ in range(workers)]
+    try:
+        for item in enumerate(job_ids):
+            await pending.put(item)
+        for _ in tasks:
+            await pending.put(None)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return [reports[index] for index in sorted(reports)]
+
+
+def iter_job_ids(stream: Iterable[str]) -> Iterator[str]:
+    for line in stream:
+        job_id = line.strip()
+        if job_id and not job_id.startswith("#"):
+            yield job_id
+
+
+async def async_main(args: argparse.Namespace) -> int:
+    job_ids = list(args.job_id)
+    if args.job_ids_file == "-":
+        # stdin belongs to the process; read it without closing it.
+        job_ids.extend(iter_job_ids(sys.stdin))
+    elif args.job_ids_file:
+        with open(args.job_ids_file, encoding="utf-8") as handle:
+            job_ids.extend(iter_job_ids(handle))
+    started = time.perf_counter()
+    async with AsyncLayerOSClient(
+        args.base_url,
+        args.token,
+        max_connections=args.max_connections or args.concurrency,
+        timeout=args.timeout,
+    ) as client:
+        reports = await run_jobs(client, job_ids, args.concurrency, job_timeout=args.job_timeout or None)
+    for report in reports:
+        print(json.dumps(report, ensure_ascii=False))
+    elapsed = time.perf_counter() - started
+    errors = sum(1 for report in reports if "error" in report and "job" not in report)
+    summary = {
+        "jobs": len(reports),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "jobs_per_second": round(len(reports) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
+    return 1 if errors else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run Layer OS jobs on one asyncio event loop")
+    parser.add_argument("--job-id", action="append", default=[], help="job id to run; repeat for several")
+    parser.add_argument("--job-ids-file", default="", help="file with one job id per line, or - for stdin")
+    parser.add_argument("--concurrency", type=int, default=64, help="jobs in flight at once (default: 64)")
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=0,
+        help="keep-alive connections to the daemon (default: same as --concurrency)",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-call deadline in seconds (default: 30)")
+    parser.add_argument(
+        "--job-timeout",
+        type=float,
+        default=0.0,
+        help="deadline for the execute step of each job; 0 means none (default: 0)",
+    )
+    parser.add_argument(
+        "--base-url",
+        required=True,
+        help="Layer OS daemon base URL, e.g. http://127.0.0.1:17808",
+    )
+    parser.add_argument(
+        "--token",
+        default="",
+        help="Write token value for Authorization: Bearer <token>",
+    )
+    args = parser.parse_args()
+    if not args.job_id and not args.job_ids_file:
+        parser.error("one of --job-id or --job-ids-file is required")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    raise SystemExit(asyncio.run(async_main(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1468 @@
+#!/usr/bin/env python3
+"""Threaded Layer OS client building blocks used by `agent_runner.py`.
+
+- `LayerOSClient`: pooled keep-alive `requests` session for the job packet,
+  update, report, and event-stream routes, with jittered retry on 5xx and
+  connection errors.
+- `StreamingPacket`: incremental decoder that exposes `job` and `runtime`
+  while `knowledge`/`handoff` are still arriving.
+- `PacketCache`: ETag-validated packet LRU with content-addressed sections,
+  optionally persisted on disk.
+- `ReportBuffer`: durable JSONL spool that closes reports through
+  `/jobs/report/batch`.
+- `RunStats`/`MetricsExporter`: per-phase timings and Prometheus output.
+- `Heartbeat` and `DispatchWatcher`: liveness updates for a running job and
+  event-stream driven job pickup.
+
+`layer_os_async_client.py` is the asyncio counterpart.
+"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import json
+import logging
+import math
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class LayerOSAgentError(RuntimeError):
+    """Raised when packet fetch or report fails."""
+
+
+RETRYABLE_STATUS = frozenset({500, 502, 503, 504})
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+STREAM_READ_TIMEOUT = 45.0
+WATCH_CLOCK_SKEW = timedelta(seconds=5)
+TERMINAL_JOB_STATUSES = frozenset({"succeeded", "failed", "canceled"})
+MAX_REPORT_BATCH = 200  # daemon limit for /jobs/report/batch
+
+log = logging.getLogger("layer_os.client")
+
+
+def iter_sse_messages(chunks: Iterable[bytes]) -> Iterator[Dict[str, str]]:
+    """Parse a `text/event-stream` byte stream into `{id, event, data}` dicts."""
+    buffer = b""
+    fields: Dict[str, str] = {}
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            newline = buffer.find(b"\n")
+            if newline < 0:
+                break
+            line = buffer[:newline].rstrip(b"\r").decode("utf-8", errors="replace")
+            buffer = buffer[newline + 1 :]
+            if not line:
+                if "data" in fields:
+                    yield fields
+                fields = {}
+                continue
+            if line.startswith(":"):
+                continue
+            name, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if name == "data" and "data" in fields:
+                fields["data"] += "\n" + value
+            elif name in {"id", "event", "data"}:
+                fields[name] = value
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff for the given 1-based retry attempt."""
+    ceiling = min(max_delay, base_delay * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+class TimingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that reports how long each new connection took to open.
+
+    The measured span covers DNS resolution, TCP connect, and any TLS
+    handshake. Reused keep-alive connections report nothing, so the count
+    shows how often the pool had to dial.
+    """
+
+    def __init__(self, on_connect: Callable[[float], None], **kwargs: Any) -> None:
+        self.on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        on_connect = self.on_connect
+
+        def timed(base: type) -> type:
+            class TimedConnection(base):  # type: ignore[misc, valid-type]
+                def connect(self) -> None:
+                    started = time.perf_counter()
+                    super().connect()
+                    on_connect(time.perf_counter() - started)
+
+            return TimedConnection
+
+        class TimedHTTPPool(HTTPConnectionPool):
+            ConnectionCls = timed(HTTPConnection)
+
+        class TimedHTTPSPool(HTTPSConnectionPool):
+            ConnectionCls = timed(HTTPSConnection)
+
+        self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPPool, "https": TimedHTTPSPool}
+
+
+class LayerOSClient:
+    """Keep-alive HTTP client for the Layer OS job packet/report surface.
+
+    One pooled `requests.Session` is shared by every call, so worker threads
+    reuse daemon connections instead of opening a socket per request. Reads
+    retry with jittered exponential backoff on 5xx and connection failures.
+    Reports are only retried once the daemon confirms the job has not already
+    landed in the reported status, so a lost response never double-closes a
+    job.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str = "",
+        *,
+        pool_size: int = 10,
+        timeout: float = 30.0,
+        max_attempts: int = 4,
+        retry_base_delay: float = 0.15,
+        retry_max_delay: float = 5.0,
+        packet_cache: Optional["PacketCache"] = None,
+        stream_packets: bool = False,
+        stats: Optional["RunStats"] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.packet_cache = packet_cache
+        self.stream_packets = stream_packets
+        self.token = token
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.session = requests.Session()
+        adapter = TimingHTTPAdapter(
+            lambda seconds: self._record("connect", seconds),
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "LayerOSClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _write_headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.token.strip():
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _record(self, phase: str, seconds: float) -> None:
+        if self.stats is not None:
+            self.stats.record_phase(phase, seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Bump a `RunStats` event counter; a no-op when the client has no stats."""
+        if self.stats is not None:
+            self.stats.count(name, amount)
+
+    def _sleep_before_retry(self, attempt: int) -> None:
+        self.count("retries")
+        time.sleep(backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay))
+
+    def _get(
+        self,
+        path: str,
+        params: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.session.get(
+                    self._url(path),
+                    params=params,
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=stream,
+                )
+            except TRANSIENT_ERRORS:
+                if attempt == self.max_attempts:
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.max_attempts:
+                    response.raise_for_status()
+                    return response
+                response.close()
+            self._sleep_before_retry(attempt)
+        raise LayerOSAgentError(f"GET {path} exhausted retries")  # pragma: no cover - loop always returns
+
+    def fetch_job_packet(self, job_id: str) -> Dict[str, Any]:
+        """Fetch a job packet, revalidating any cached copy with its ETag.
+
+        Packets served from the cache are shared objects; treat them as
+        read-only.
+        """
+        cached = self.packet_cache.get(job_id) if self.packet_cache is not None else None
+        headers = {"If-None-Match": cached[0]} if cached is not None else None
+        started = time.perf_counter()
+        response = self._get("/api/layer-os/jobs/packet", {"job_id": job_id}, headers)
+        if response.status_code == 304 and cached is not None:
+            self._record("fetch", time.perf_counter() - started)
+            self.count("packet_cache_revalidated")
+            return cached[1]
+        body = response.content
+        decode_started = time.perf_counter()
+        self._record("fetch", decode_started - started)
+        packet = json.loads(body)
+        self._record("decode", time.perf_counter() - decode_started)
+        etag = response.headers.get("ETag", "")
+        if self.packet_cache is not None and etag:
+            packet = self.packet_cache.put(job_id, etag, packet)
+        return packet
+
+    def open_job_packet(self, job_id: str) -> Union["StreamingPacket", Dict[str, Any]]:
+        """Start decoding a job packet while its body is still arriving.
+
+        Returns the cached packet when the daemon answers 304. Otherwise the
+        caller owns the returned `StreamingPacket` and must `close()` it.
+        Streamed packets are not added to the packet cache, since caching them
+        would mean decoding the whole body up front.
+        """
+        cached = self.packet_cache.get(job_id) if self.packet_cache is not None else None
+        headers = {"If-None-Match": cached[0]} if cached is not None else None
+        started = time.perf_counter()
+        response = self._get("/api/layer-os/jobs/packet", {"job_id": job_id}, headers, stream=True)
+        # Streamed bodies are decoded while they download, so only
+        # time-to-headers is recorded; no separate decode phase exists.
+        self._record("fetch", time.perf_counter() - started)
+        if response.status_code == 304 and cached is not None:
+            response.close()
+            self.count("packet_cache_revalidated")
+            return cached[1]
+        return StreamingPacket(response.iter_content(chunk_size=64 * 1024), close=response.close)
+
+    def list_jobs(self, status: str = "", limit: int = 0) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {}
+        if status:
+            params["status"] = status
+        if limit > 0:
+            params["limit"] = limit
+        return list(self._get("/api/layer-os/jobs", params).json().get("items") or [])
+
+    def stream_events(self, last_event_id: str = "") -> Iterator[Dict[str, Any]]:
+        """Yield decoded events from `/events/stream` until the connection drops.
+
+        The read timeout sits well above the daemon's 15s heartbeat comment, so
+        a silent half-open connection surfaces as `requests.Timeout`.
+        """
+        headers = {"Accept": "text/event-stream"}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        with self.session.get(
+            self._url("/api/layer-os/events/stream"),
+            headers=headers,
+            stream=True,
+            timeout=(self.timeout, STREAM_READ_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            for message in iter_sse_messages(response.iter_content(chunk_size=None)):
+                try:
+                    event = json.loads(message.get("data", ""))
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(event, dict):
+                    event.setdefault("event_id", message.get("id", ""))
+                    yield event
+
+    def update_job(
+        self,
+        job_id: str,
+        status: str,
+        notes: List[str],
+        result: Optional[Dict[str, Any]],
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Post one `/jobs/update`; the daemon replaces notes and result wholesale."""
+        body = {"job_id": job_id, "status": status, "notes": notes, "result": result}
+        response = self.session.post(
+            self._url("/api/layer-os/jobs/update"),
+            headers=self._write_headers(),
+            data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+            timeout=timeout or self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _report_already_landed(self, job_id: str, status: str) -> Optional[Dict[str, Any]]:
+        try:
+            packet = self.fetch_job_packet(job_id)
+        except requests.RequestException:
+            return None
+        job = packet.get("job", {})
+        if job.get("status") != status:
+            return None
+        self.count("reports_confirmed_after_retry")
+        return {"job": job, "warnings": ["report_confirmed_after_retry"]}
+
+    def report_job(self, job_id: str, status: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(report_payload(job_id, status, result), ensure_ascii=False).encode("utf-8")
+        url = self._url("/api/layer-os/jobs/report")
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1:
+                landed = self._report_already_landed(job_id, status)
+                if landed is not None:
+                    return landed
+            try:
+                response = self.session.post(url, headers=self._write_headers(), data=body, timeout=self.timeout)
+            except TRANSIENT_ERRORS:
+                if attempt == self.max_attempts:
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.max_attempts:
+                    response.raise_for_status()
+                    return response.json()
+            self._sleep_before_retry(attempt)
+        raise LayerOSAgentError(f"report for {job_id} exhausted retries")  # pragma: no cover - loop always returns
+
+    def report_jobs_batch(self, reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Close several reports with one `/jobs/report/batch` call.
+
+        The daemon acknowledges a job that already carries the reported status
+        as `duplicate`, so the whole batch is safe to resend after a transient
+        failure. Daemons without the batch route get one report call per entry.
+        """
+        body = json.dumps({"reports": reports}, ensure_ascii=False).encode("utf-8")
+        url = self._url("/api/layer-os/jobs/report/batch")
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.session.post(url, headers=self._write_headers(), data=body, timeout=self.timeout)
+            except TRANSIENT_ERRORS:
+                if attempt == self.max_attempts:
+                    raise
+            else:
+                if response.status_code == 404:
+                    return [self._report_one(item) for item in reports]
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.max_attempts:
+                    response.raise_for_status()
+                    return list(response.json().get("items") or [])
+            self._sleep_before_retry(attempt)
+        raise LayerOSAgentError("report batch exhausted retries")  # pragma: no cover - loop always returns
+
+    def _report_one(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = str(payload.get("job_id", ""))
+        try:
+            report = self.report_job(job_id, str(payload.get("status", "")), dict(payload.get("result") or {}))
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code < 500:
+                return {"job_id": job_id, "outcome": "rejected", "error": exc.response.text}
+            raise
+        return {"job_id": job_id, "outcome": "reported", "report": report}
+
+
+class StreamingPacket(Mapping):
+    """Read-only view of a JSON packet that decodes top-level members on demand.
+
+    Members are parsed in wire order only as far as a lookup needs, so `job`
+    and `runtime` are usable as soon as they have arrived. Bulky sections in
+    `LAZY_SECTIONS` are kept as undecoded text when a later key is requested
+    and only turned into Python objects when read. `iter_section` walks a
+    section member by member without ever holding all of it decoded.
+    """
+
+    LAZY_SECTIONS = frozenset({"knowledge", "handoff", "handoff_summary"})
+    _STRUCTURAL = re.compile(r'["{}\[\]]')
+    _STRING_SPECIAL = re.compile(r'["\\]')
+    _SCALAR_END = re.compile(r"[\s,}\]]")
+    _WHITESPACE = " \t\r\n"
+
+    def __init__(self, chunks: Iterable[bytes], close: Optional[Callable[[], None]] = None) -> None:
+        self._chunks = iter(chunks)
+        self._close = close
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._exhausted = False
+        self._started = False
+        self._done = False
+        self._order: List[str] = []
+        self._values: Dict[str, Any] = {}
+        self._raw: Dict[str, str] = {}
+        self._streamed: Set[str] = set()
+
+    def close(self) -> None:
+        """Discard the unread tail and release the connection for reuse."""
+        if self._close is not None:
+            if not self._exhausted:
+                for _ in self._chunks:
+                    pass
+                self._exhausted = True
+            self._close()
+            self._close = None
+
+    def __enter__(self) -> "StreamingPacket":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+    def __getitem__(self, key: str) -> Any:
+        while key not in self._values and key not in self._raw and key not in self._streamed:
+            if not self._advance():
+                raise KeyError(key)
+        if key in self._streamed:
+            raise LayerOSAgentError(f"packet section {key!r} was already consumed by iter_section")
+        if key in self._raw:
+            self._values[key] = json.loads(self._raw.pop(key))
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        while self._advance():
+            pass
+        return iter(list(self._order))
+
+    def __len__(self) -> int:
+        while self._advance():
+            pass
+        return len(self._order)
+
+    def iter_section(self, name: str) -> Iterator[Tuple[str, Any]]:
+        """Yield `(key, value)` pairs of an object section as they are decoded.
+
+        When the section has not been reached yet, each member is dropped once
+        the caller moves on, and the section can't be read again afterwards.
+        Closing the generator early skips the unread members, so later keys
+        stay readable.
+        """
+        if name in self._values or name in self._raw:
+            section = self[name]
+            yield from section.items() if isinstance(section, dict) else ()
+            return
+        while True:
+            key = self._next_key()
+            if key is None:
+                return
+            if key == name:
+                break
+            self._store(key)
+        self._order.append(name)
+        self._streamed.add(name)
+        self._skip_ws()
+        if self._buf[self._pos] != "{":
+            self._pos = self._scan_value()
+            self._compact()
+            return
+        self._pos += 1
+        first = True
+        try:
+            while self._next_member(first):
+                first = False
+                member = self._read_key()
+                start = self._pos
+                end = self._scan_value()
+                value = json.loads(self._buf[start:end])
+                self._pos = end
+                self._compact()
+                yield member, value
+        except GeneratorExit:
+            # The caller stopped early: step over the rest of the section so
+            # the cursor is back at the top level for later lookups.
+            while self._next_member(first):
+                first = False
+                self._read_key()
+                self._pos = self._scan_value()
+                self._compact()
+            raise
+
+    def _next_member(self, first: bool) -> bool:
+        """Move past the separator before the next member of an open object."""
+        self._skip_ws()
+        if self._buf[self._pos] == "}":
+            self._pos += 1
+            return False
+        if not first:
+            self._expect(",")
+        return True
+
+    def _advance(self) -> bool:
+        key = self._next_key()
+        if key is None:
+            return False
+        self._store(key)
+        return True
+
+    def _store(self, key: str) -> None:
+        start = self._pos
+        end = self._scan_value()
+        text = self._buf[start:end]
+        self._pos = end
+        self._order.append(key)
+        if key in self.LAZY_SECTIONS:
+            self._raw[key] = text
+        else:
+            self._values[key] = json.loads(text)
+        self._compact()
+
+    def _next_key(self) -> Optional[str]:
+        if self._done:
+            return None
+        self._skip_ws()
+        if not self._started:
+            self._expect("{")
+            self._started = True
+            self._skip_ws()
+            if self._buf[self._pos] == "}":
+                self._done = True
+                return None
+        else:
+            self._skip_ws()
+            if self._buf[self._pos] == "}":
+                self._done = True
+                return None
+            self._expect(",")
+        return self._read_key()
+
+    def _read_key(self) -> str:
+        self._skip_ws()
+        start = self._pos
+        end = self._scan_value()
+        key = json.loads(self._buf[start:end])
+        self._pos = end
+        self._skip_ws()
+        self._expect(":")
+        self._skip_ws()
+        return key
+
+    def _fill(self) -> bool:
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buf += text
+                return True
+        if not self._exhausted:
+            self._exhausted = True
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self._buf += tail
+                return True
+        return False
+
+    def _compact(self) -> None:
+        if self._pos > 64 * 1024 or self._pos == len(self._buf):
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+    def _skip_ws(self) -> None:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return
+            if not self._fill():
+                raise LayerOSAgentError("job packet ended before the JSON object was complete")
+
+    def _expect(self, char: str) -> None:
+        if self._buf[self._pos] != char:
+            raise LayerOSAgentError(f"malformed job packet: expected {char!r} at offset {self._pos}")
+        self._pos += 1
+
+    def _scan_value(self) -> int:
+        """Return the end offset of the value at the cursor, reading more as needed."""
+        first = self._buf[self._pos]
+        if first == '"':
+            return self._scan_string(self._pos + 1)
+        if first not in "{[":
+            while True:
+                match = self._SCALAR_END.search(self._buf, self._pos)
+                if match is not None:
+                    return match.start()
+                if not self._fill():
+                    return len(self._buf)
+        depth = 0
+        index = self._pos
+        while True:
+            match = self._STRUCTURAL.search(self._buf, index)
+            if match is None:
+                index = len(self._buf)
+                if not self._fill():
+                    raise LayerOSAgentError("job packet ended inside a JSON value")
+                continue
+            char = match.group()
+            if char == '"':
+                index = self._scan_string(match.end())
+                continue
+            index = match.end()
+            depth += 1 if char in "{[" else -1
+            if depth == 0:
+                return index
+
+    def _scan_string(self, index: int) -> int:
+        while True:
+            match = self._STRING_SPECIAL.search(self._buf, index)
+            if match is None:
+                index = len(self._buf)
+                if not self._fill():
+                    raise LayerOSAgentError("job packet ended inside a JSON string")
+                continue
+            if match.group() == '"':
+                return match.end()
+            index = match.end() + 1
+            while index > len(self._buf):
+                if not self._fill():
+                    raise LayerOSAgentError("job packet ended inside a JSON string")
+
+
+def canonical_digest(value: Any) -> str:
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PacketCache:
+    """LRU of job packets keyed by job id and validated by the daemon ETag.
+
+    Bulky sections (`knowledge`, `handoff`, `handoff_summary`, `prompting`)
+    are stored content-addressed, so jobs that share the same knowledge block
+    share one decoded object instead of one copy per job. With `disk_dir` set,
+    entries also survive restarts: `jobs/` holds the per-job ETag and section
+    digests, `blocks/` holds each section once, and the oldest job entries are
+    evicted past `max_disk_entries`. The directory is listed once at startup;
+    after that an in-memory recency index decides what to evict, and orphaned
+    blocks are swept only after every `max_disk_entries // 4` evictions.
+    """
+
+    SHARED_SECTIONS = ("knowledge", "handoff", "handoff_summary", "prompting")
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        disk_dir: Optional[Path] = None,
+        max_disk_entries: int = 4096,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._blocks: Dict[str, Any] = {}
+        self._block_refs: Dict[str, int] = {}
+        self._digests: Dict[str, Dict[str, str]] = {}
+        self._disk_index: "OrderedDict[str, None]" = OrderedDict()
+        self._disk_evicted = 0
+        if disk_dir is not None:
+            (disk_dir / "jobs").mkdir(parents=True, exist_ok=True)
+            (disk_dir / "blocks").mkdir(parents=True, exist_ok=True)
+            self._index_disk()
+
+    def get(self, job_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None:
+                self._entries.move_to_end(job_id)
+                self.hits += 1
+                return entry
+        entry = self._load_disk(job_id)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember_locked(job_id, entry)
+            return entry
+
+    def put(self, job_id: str, etag: str, packet: Dict[str, Any]) -> Dict[str, Any]:
+        """Store `packet` and return the deduplicated copy callers should use."""
+        digests = {
+            name: canonical_digest(packet[name])
+            for name in self.SHARED_SECTIONS
+            if packet.get(name) is not None
+        }
+        with self._lock:
+            shared = dict(packet)
+            for name, digest in digests.items():
+                shared[name] = self._blocks.setdefault(digest, packet[name])
+            entry = (etag, shared)
+            self._remember_locked(job_id, entry, digests)
+        if self.disk_dir is not None:
+            self._store_disk(job_id, etag, shared, digests)
+        return shared
+
+    def _remember_locked(
+        self,
+        job_id: str,
+        entry: Tuple[str, Dict[str, Any]],
+        digests: Optional[Dict[str, str]] = None,
+    ) -> None:
+        if digests is None:
+            digests = {
+                name: canonical_digest(entry[1][name])
+                for name in self.SHARED_SECTIONS
+                if entry[1].get(name) is not None
+            }
+        if self._entries.pop(job_id, None) is not None:
+            self._release_locked(job_id)
+        for digest in digests.values():
+            self._block_refs[digest] = self._block_refs.get(digest, 0) + 1
+        self._digests[job_id] = digests
+        self._entries[job_id] = entry
+        while len(self._entries) > self.max_entries:
+            evicted_id, _ = self._entries.popitem(last=False)
+            self._release_locked(evicted_id)
+
+    def _release_locked(self, job_id: str) -> None:
+        for digest in self._digests.pop(job_id, {}).values():
+            remaining = self._block_refs.get(digest, 0) - 1
+            if remaining > 0:
+                self._block_refs[digest] = remaining
+            else:
+                self._block_refs.pop(digest, None)
+                self._blocks.pop(digest, None)
+
+    def _job_path(self, job_id: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / "jobs" / f"{hashlib.sha1(job_id.encode('utf-8')).hexdigest()}.json"
+
+    def _store_disk(self, job_id: str, etag: str, packet: Dict[str, Any], digests: Dict[str, str]) -> None:
+        assert self.disk_dir is not None
+        for name, digest in digests.items():
+            block_path = self.disk_dir / "blocks" / f"{digest}.json"
+            if not block_path.exists():
+                write_json_atomic(block_path, packet[name])
+        rest = {key: value for key, value in packet.items() if key not in digests}
+        path = self._job_path(job_id)
+        write_json_atomic(path, {"job_id": job_id, "etag": etag, "digests": digests, "packet": rest})
+        with self._lock:
+            self._disk_index[path.name] = None
+            self._disk_index.move_to_end(path.name)
+        self._evict_disk()
+
+    def _load_disk(self, job_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        if self.disk_dir is None:
+            return None
+        path = self._job_path(job_id)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+            packet = dict(record["packet"])
+            for name, digest in record.get("digests", {}).items():
+                with self._lock:
+                    block = self._blocks.get(digest)
+                if block is None:
+                    block = json.loads((self.disk_dir / "blocks" / f"{digest}.json").read_text(encoding="utf-8"))
+                    with self._lock:
+                        block = self._blocks.setdefault(digest, block)
+                packet[name] = block
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        with self._lock:
+            self._disk_index[path.name] = None
+            self._disk_index.move_to_end(path.name)
+        return str(record.get("etag", "")), packet
+
+    def _index_disk(self) -> None:
+        assert self.disk_dir is not None
+        entries: List[Tuple[float, str]] = []
+        for path in (self.disk_dir / "jobs").glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path.name))
+            except OSError:
+                continue
+        for _, name in sorted(entries):
+            self._disk_index[name] = None
+
+    def _evict_disk(self) -> None:
+        assert self.disk_dir is not None
+        with self._lock:
+            stale = []
+            while len(self._disk_index) > self.max_disk_entries:
+                stale.append(self._disk_index.popitem(last=False)[0])
+            self._disk_evicted += len(stale)
+            sweep = self._disk_evicted >= max(1, self.max_disk_entries // 4)
+            if sweep:
+                self._disk_evicted = 0
+        for name in stale:
+            (self.disk_dir / "jobs" / name).unlink(missing_ok=True)
+        # Blocks are content-addressed and small in number; sweep orphans lazily.
+        if sweep:
+            live: Set[str] = set()
+            for path in (self.disk_dir / "jobs").glob("*.json"):
+                try:
+                    live.update(json.loads(path.read_text(encoding="utf-8")).get("digests", {}).values())
+                except (OSError, ValueError):
+                    continue
+            for block in (self.disk_dir / "blocks").glob("*.json"):
+                if block.stem not in live:
+                    block.unlink(missing_ok=True)
+
+
+def write_json_atomic(path: Path, value: Any) -> None:
+    temp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    temp_path.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def report_payload(job_id: str, status: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "status": status,
+        "notes": result.get("notes", []),
+        "result": result,
+    }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; returns 0.0 for an empty sample."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class RunStats:
+    """Thread-safe per-phase latency and outcome counters for one runner.
+
+    Phases are `connect`, `fetch`, `decode`, `execute`, and `report`. Each one
+    keeps exact totals plus the most recent `WINDOW` samples for percentiles,
+    so a long-lived `--watch` runner stays bounded in memory. Timings recorded
+    inside `job_scope()` are also collected for that job alone, so they can
+    be attached to its result.
+    """
+
+    PHASES = ("connect", "fetch", "decode", "execute", "report")
+    WINDOW = 4096
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started_at = time.perf_counter()
+        self.completed = 0
+        self.failed = 0
+        self.errors = 0
+        self.counters: Dict[str, int] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(phase)
+            if samples is None:
+                samples = self._samples[phase] = deque(maxlen=self.WINDOW)
+            samples.append(seconds)
+            self._totals[phase] = self._totals.get(phase, 0.0) + seconds
+            self._counts[phase] = self._counts.get(phase, 0) + 1
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(phase, time.perf_counter() - started)
+
+    @contextmanager
+    def job_scope(self) -> Iterator[Dict[str, float]]:
+        """Collect the phases this thread records until the block exits."""
+        timings: Dict[str, float] = {}
+        self._local.timings = timings
+        try:
+            yield timings
+        finally:
+            self._local.timings = None
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_outcome(self, status: str) -> None:
+        with self._lock:
+            self.completed += 1
+            if status != "succeeded":
+                self.failed += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+            phases: Dict[str, Dict[str, Any]] = {}
+            for phase in sorted(self._samples, key=self._phase_order):
+                window = list(self._samples[phase])
+                phases[phase] = {
+                    "count": self._counts[phase],
+                    "mean": round(self._totals[phase] / self._counts[phase] * 1000, 2),
+                    "p50": round(percentile(window, 50) * 1000, 2),
+                    "p99": round(percentile(window, 99) * 1000, 2),
+                }
+            return {
+                "jobs": self.completed,
+                "failed": self.failed,
+                "errors": self.errors,
+                "elapsed_seconds": round(elapsed, 3),
+                "jobs_per_second": round(self.completed / elapsed, 3),
+                "phase_ms": phases,
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def prometheus(self) -> str:
+        """Render the current counters in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP layer_os_agent_phase_seconds Agent runner phase latency (recent window quantiles).",
+                "# TYPE layer_os_agent_phase_seconds summary",
+            ]
+            for phase in sorted(self._samples, key=self._phase_order):
+                window = list(self._samples[phase])
+                for quantile in (0.5, 0.9, 0.99):
+                    value = percentile(window, quantile * 100)
+                    lines.append(f'layer_os_agent_phase_seconds{{phase="{phase}",quantile="{quantile}"}} {value:.6f}')
+                lines.append(f'layer_os_agent_phase_seconds_sum{{phase="{phase}"}} {self._totals[phase]:.6f}')
+                lines.append(f'layer_os_agent_phase_seconds_count{{phase="{phase}"}} {self._counts[phase]}')
+            lines += [
+                "# HELP layer_os_agent_jobs_total Jobs the runner closed, by outcome.",
+                "# TYPE layer_os_agent_jobs_total counter",
+                f'layer_os_agent_jobs_total{{outcome="succeeded"}} {self.completed - self.failed}',
+                f'layer_os_agent_jobs_total{{outcome="failed"}} {self.failed}',
+                f'layer_os_agent_jobs_total{{outcome="error"}} {self.errors}',
+                "# HELP layer_os_agent_events_total Retries, confirmations, and other runner events.",
+                "# TYPE layer_os_agent_events_total counter",
+            ]
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'layer_os_agent_events_total{{event="{name}"}} {value}')
+            elapsed = time.perf_counter() - self.started_at
+            lines += [
+                "# HELP layer_os_agent_uptime_seconds Seconds since the runner started.",
+                "# TYPE layer_os_agent_uptime_seconds gauge",
+                f"layer_os_agent_uptime_seconds {elapsed:.3f}",
+            ]
+            return "\n".join(lines) + "\n"
+
+    def _phase_order(self, phase: str) -> Tuple[int, str]:
+        return (self.PHASES.index(phase) if phase in self.PHASES else len(self.PHASES), phase)
+
+
+class MetricsExporter:
+    """Publish `RunStats.prometheus()` to a text file and/or an HTTP endpoint.
+
+    The file is rewritten atomically every `interval` seconds (the layout the
+    node_exporter textfile collector expects) and once more on `stop()`.
+    `port` serves the same text at `/metrics` on 127.0.0.1.
+    """
+
+    def __init__(self, stats: RunStats, path: Optional[Path] = None, port: int = 0, interval: float = 10.0) -> None:
+        self.stats = stats
+        self.path = path
+        self.port = port
+        self.interval = max(0.5, interval)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "MetricsExporter":
+        if self.path is not None:
+            self._thread = threading.Thread(target=self._run, name="layer-os-metrics", daemon=True)
+            self._thread.start()
+        if self.port > 0:
+            stats = self.stats
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self) -> None:
+                    if self.path.split("?", 1)[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = stats.prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *_args: Any) -> None:
+                    pass
+
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, name="layer-os-metrics-http", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.write()
+
+    def write(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(self.stats.prometheus(), encoding="utf-8")
+        os.replace(temp_path, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                self.stats.count("metrics_write_failures")
+
+
+class ReportBuffer:
+    """Coalesce terminal reports into `/jobs/report/batch` calls.
+
+    Every submitted report is appended to a local JSONL spool and fsynced
+    before `submit` returns, then flushed when `max_batch` reports are pending
+    or the oldest has waited `flush_interval` seconds. Delivered entries are
+    compacted out of the spool; anything left over from a crash is replayed on
+    the next start, giving at-least-once delivery. A later report for the same
+    job replaces the pending one.
+
+    Only 5xx and connection failures are retried. Reports the daemon rejects
+    with a 4xx, whether for the whole batch or per entry, can never succeed as
+    sent, so they are moved to a `.dead.jsonl` file next to the spool and
+    logged instead.
+    """
+
+    def __init__(
+        self,
+        client: LayerOSClient,
+        spool_path: Path,
+        *,
+        max_batch: int = 25,
+        flush_interval: float = 0.5,
+        on_delivered: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        self.client = client
+        self.spool_path = spool_path
+        self.dead_letter_path = spool_path.with_suffix(".dead.jsonl")
+        self.max_batch = min(max(1, max_batch), MAX_REPORT_BATCH)
+        self.flush_interval = flush_interval
+        self.on_delivered = on_delivered or (lambda item: None)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._oldest: Optional[float] = None
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._failures = 0
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        self._recover()
+        self._thread = threading.Thread(target=self._run, name="layer-os-report-flush", daemon=True)
+        self._thread.start()
+
+    def _recover(self) -> None:
+        if not self.spool_path.exists():
+            return
+        with self.spool_path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from a crash mid-append
+                if isinstance(entry, dict) and entry.get("job_id"):
+                    self._pending[str(entry["job_id"])] = entry
+        if self._pending:
+            self._oldest = time.monotonic()
+
+    def submit(self, job_id: str, status: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        payload = report_payload(job_id, status, result)
+        line = json.dumps(payload, ensure_ascii=False) + "\n"
+        with self._lock:
+            with self.spool_path.open("a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+            self._pending[job_id] = payload
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._pending) >= self.max_batch:
+                self._wake.set()
+        return {"job_id": job_id, "status": status, "spooled": True}
+
+    def _due(self) -> bool:
+        with self._lock:
+            if not self._pending:
+                return False
+            waited = time.monotonic() - (self._oldest or time.monotonic())
+            return len(self._pending) >= self.max_batch or waited >= self.flush_interval
+
+    def flush(self) -> int:
+        """Deliver pending reports; returns how many left the spool."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())[: self.max_batch]
+            if not batch:
+                return 0
+            try:
+                items = self.client.report_jobs_batch(batch)
+            except requests.HTTPError as exc:
+                response = exc.response
+                if response is None or response.status_code >= 500:
+                    raise
+                items = [
+                    {"job_id": payload["job_id"], "outcome": "rejected", "error": response.text}
+                    for payload in batch
+                ]
+            settled = {str(item.get("job_id", "")): item for item in items}
+            self._dead_letter(
+                [
+                    (payload, settled[str(payload["job_id"])])
+                    for payload in batch
+                    if settled.get(str(payload["job_id"]), {}).get("outcome") == "rejected"
+                ]
+            )
+            with self._lock:
+                for payload in batch:
+                    job_id = str(payload["job_id"])
+                    if job_id in settled and self._pending.get(job_id) is payload:
+                        del self._pending[job_id]
+                self._oldest = time.monotonic() if self._pending else None
+                self._compact_locked()
+            for item in items:
+                self.on_delivered(item)
+            return len(settled)
+
+    def _dead_letter(self, rejected: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        if not rejected:
+            return
+        with self.dead_letter_path.open("a", encoding="utf-8") as handle:
+            for payload, item in rejected:
+                entry = {"report": payload, "error": item.get("error", "")}
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                log.warning("report for %s rejected, moved to %s: %s", payload["job_id"], self.dead_letter_path, entry["error"])
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _compact_locked(self) -> None:
+        temp_path = self.spool_path.with_suffix(self.spool_path.suffix + ".tmp")
+        with temp_path.open("w", encoding="utf-8") as handle:
+            for payload in self._pending.values():
+                handle.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self.spool_path)
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(timeout=self.flush_interval / 2 if self.flush_interval > 0 else 0.05)
+            self._wake.clear()
+            if not self._due():
+                continue
+            try:
+                while self.flush() and self._due():
+                    pass
+                self._failures = 0
+            except requests.RequestException:
+                self._failures += 1
+                self._closed.wait(backoff_delay(self._failures, self.client.retry_base_delay, self.client.retry_max_delay))
+
+    def close(self) -> None:
+        """Stop the flusher and make one last delivery attempt.
+
+        Reports that still cannot be delivered stay in the spool for the next
+        run instead of raising.
+        """
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        try:
+            while self.flush():
+                pass
+        except requests.RequestException:
+            pass
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+class Heartbeat:
+    """Background liveness updates for one running job.
+
+    Every `interval` seconds the job is re-posted to `/jobs/update` as
+    `running` with a `result.heartbeat` block: beat count, elapsed seconds,
+    the current phase, and whatever counters `progress()` accumulated since
+    the job started. Progress calls only touch local counters, so an executor
+    may report every token without adding requests; they are coalesced into
+    the next beat. The daemon overwrites notes and result on update, so each
+    beat re-sends the job's own notes and merges into its existing result,
+    with `dispatch_state` moved from `packet_ready` to `executing` so other
+    watchers don't claim the job again. That claim beat is sent synchronously
+    by `start()`; with an `interval` of 0 it is the only beat.
+    Heartbeats are best effort: failures are counted, never raised.
+    """
+
+    def __init__(
+        self,
+        client: LayerOSClient,
+        job_id: str,
+        job: Dict[str, Any],
+        interval: float,
+    ) -> None:
+        self.client = client
+        self.job_id = job_id
+        self.interval = interval
+        self.notes = list(job.get("notes") or [])
+        self.base_result = dict(job.get("result") or {})
+        self.enabled = job.get("status") == "running"
+        self.beats = 0
+        self.failures = 0
+        self.phase = "started"
+        self.counters: Dict[str, float] = {}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def progress(self, phase: str = "", **counters: float) -> None:
+        """Record progress, e.g. `progress(tokens=128)` or `progress(phase="tool_call")`."""
+        with self._lock:
+            if phase:
+                self.phase = phase
+            for name, value in counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def start(self) -> "Heartbeat":
+        if self.enabled and self.beats == 0:
+            self._beat()
+        if self.enabled and self.interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"heartbeat-{self.job_id}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop beating and wait out any in-flight update, so it can't land after the report."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "Heartbeat":
+        return self.start()
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "beat": self.beats,
+                "phase": self.phase,
+                "elapsed_seconds": round(time.monotonic() - self._started, 3),
+                "sent_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                **{name: round(value, 3) for name, value in self.counters.items()},
+            }
+
+    def _beat(self) -> None:
+        with self._lock:
+            self.beats += 1
+        result = dict(self.base_result)
+        result["dispatch_state"] = "executing"
+        result["heartbeat"] = self.snapshot()
+        try:
+            self.client.update_job(self.job_id, "running", self.notes, result, timeout=self.interval or None)
+        except (requests.RequestException, ValueError):
+            with self._lock:
+                self.failures += 1
+            self.client.count("heartbeat_failures")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._beat()
+
+
+def parse_event_timestamp(value: Any) -> Optional[datetime]:
+    """Parse a Go RFC3339Nano timestamp; nanoseconds are truncated to micros."""
+    if not isinstance(value, str) or not value:
+        return None
+    text = re.sub(r"(\.\d{6})\d+", r"\1", value.strip()).replace("Z", "+00:00")
+    try:
+        stamp = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+class PreparedJob(NamedTuple):
+    job_id: str
+    packet: Dict[str, Any]
+
+
+def packet_ready(job: Dict[str, Any]) -> bool:
+    """True for a dispatched job that no runner has started beating on yet."""
+    result = job.get("result") or {}
+    return (
+        job.get("status") == "running"
+        and result.get("dispatch_state") == "packet_ready"
+        and "heartbeat" not in result
+    )
+
+
+class DispatchWatcher:
+    """Turn daemon dispatch events into prefetched, ready-to-run jobs.
+
+    One thread follows `/events/stream`, resuming with `Last-Event-ID` after a
+    drop. Each `agent_job.updated` event that marks a job `packet_ready` is
+    handed to a small prefetch pool, so the packet is already in memory by the
+    time a worker slot frees up. Jobs that were packet-ready before the watcher
+    started are swept once from `/jobs?status=running`, so events older than
+    the watcher (the daemon replays history on a fresh connect) are ignored.
+    A prefetched packet must still show the job as ready before it is queued.
+    """
+
+    def __init__(
+        self,
+        client: LayerOSClient,
+        roles: Iterable[str] = (),
+        *,
+        prefetch_workers: int = 2,
+        max_ready: int = 16,
+        reconnect_max_delay: float = 10.0,
+    ) -> None:
+        self.client = client
+        self.roles = {role.strip() for role in roles if role.strip()}
+        self.reconnect_max_delay = reconnect_max_delay
+        self.last_event_id = ""
+        self.reconnects = 0
+        self.started_at = datetime.now(timezone.utc) - WATCH_CLOCK_SKEW
+        self._seen: Set[str] = set()
+        self._seen_lock = threading.Lock()
+        self._ready: "queue.Queue[PreparedJob]" = queue.Queue(maxsize=max(1, max_ready))
+        self._stop = threading.Event()
+        self._prefetch = ThreadPoolExecutor(max_workers=max(1, prefetch_workers), thread_name_prefix="layer-os-prefetch")
+        self._thread = threading.Thread(target=self._follow, name="layer-os-events", daemon=True)
+
+    def start(self) -> "DispatchWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._prefetch.shutdown(wait=False, cancel_futures=True)
+
+    def __iter__(self) -> Iterator[PreparedJob]:
+        while not self._stop.is_set():
+            try:
+                yield self._ready.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _role_allowed(self, role: Any) -> bool:
+        return not self.roles or str(role or "") in self.roles
+
+    def _claim(self, job_id: str) -> None:
+        with self._seen_lock:
+            if not job_id or job_id in self._seen:
+                return
+            self._seen.add(job_id)
+        self._prefetch.submit(self._prepare, job_id)
+
+    def _release(self, job_id: str) -> None:
+        with self._seen_lock:
+            self._seen.discard(job_id)
+
+    def _prepare(self, job_id: str) -> None:
+        """Prefetch and queue one job; a job that is not queued is released.
+
+        Queued jobs stay claimed until their terminal event arrives, so a
+        repeated `packet_ready` event can't hand the same job out twice.
+        """
+        queued = False
+        try:
+            try:
+                packet = self.client.fetch_job_packet(job_id)
+            except requests.RequestException:
+                return
+            job = packet.get("job") or {}
+            if not packet_ready(job) or not self._role_allowed(job.get("role")):
+                return
+            while not self._stop.is_set():
+                try:
+                    self._ready.put(PreparedJob(job_id, packet), timeout=0.5)
+                    queued = True
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            if not queued:
+                self._release(job_id)
+
+    def _sweep_backlog(self) -> None:
+        for job in self.client.list_jobs(status="running"):
+            if packet_ready(job) and self._role_allowed(job.get("role")):
+                self._claim(str(job.get("job_id", "")))
+
+    def _handle(self, event: Dict[str, Any]) -> None:
+        kind = str(event.get("kind", ""))
+        job_id = str(event.get("work_item_id", ""))
+        data = event.get("data") or {}
+        if kind == "agent_job.updated":
+            stamp = parse_event_timestamp(event.get("timestamp"))
+            if stamp is not None and stamp < self.started_at:
+                return
+            job = {"status": data.get("status"), "result": data.get("result") or {}}
+            if packet_ready(job) and self._role_allowed(data.get("role")):
+                self._claim(job_id)
+        elif kind.startswith("agent_job.") and kind.split(".", 1)[1] in TERMINAL_JOB_STATUSES:
+            self._release(job_id)
+
+    def _follow(self) -> None:
+        attempt = 0
+        swept = False
+        while not self._stop.is_set():
+            try:
+                if not swept:
+                    self._sweep_backlog()
+                    swept = True
+                for event in self.client.stream_events(self.last_event_id):
+                    attempt = 0
+                    self.last_event_id = str(event.get("event_id") or self.last_event_id)
+                    self._handle(event)
+                    if self._stop.is_set():
+                        return
+            except requests.RequestException:
+                pass
+            if self._stop.is_set():
+                return
+            attempt += 1
+            self.reconnects += 1
+            self._stop.wait(backoff_delay(attempt, self.client.retry_base_delay, self.reconnect_max_delay))
@@ -0,0 +1,63 @@
+import json
+import unittest
+
+from layer_os_client import Heartbeat, StreamingPacket
+
+
+def chunked(payload: object, size: int = 3):
+    raw = json.dumps(payload).encode("utf-8")
+    return [raw[index:index + size] for index in range(0, len(raw), size)]
+
+
+class StreamingPacketTest(unittest.TestCase):
+    PACKET = {
+        "job": {"job_id": "job-1"},
+        "knowledge": {"a": 1, "b": [2, {"x": "}"}], "c": "d,e"},
+        "handoff": {"next": "review"},
+        "runtime": {"mode": "agent"},
+    }
+
+    def test_iter_section_break_keeps_later_keys_readable(self) -> None:
+        packet = StreamingPacket(chunked(self.PACKET))
+        for key, value in packet.iter_section("knowledge"):
+            self.assertEqual((key, value), ("a", 1))
+            break
+        self.assertEqual(packet["handoff"], {"next": "review"})
+        self.assertEqual(list(packet), ["job", "knowledge", "handoff", "runtime"])
+
+    def test_iter_section_reads_every_member(self) -> None:
+        packet = StreamingPacket(chunked(self.PACKET))
+        self.assertEqual(dict(packet.iter_section("knowledge")), self.PACKET["knowledge"])
+        self.assertEqual(packet["runtime"], {"mode": "agent"})
+
+
+class RecordingClient:
+    def __init__(self) -> None:
+        self.updates = []
+
+    def update_job(self, job_id, status, notes, result, timeout=None):
+        self.updates.append((job_id, status, result))
+        return {}
+
+    def count(self, name, amount=1):
+        pass
+
+
+class HeartbeatTest(unittest.TestCase):
+    def test_start_sends_claim_beat_without_interval(self) -> None:
+        client = RecordingClient()
+        with Heartbeat(client, "job-1", {"status": "running", "result": {"dispatch_state": "packet_ready"}}, 0):
+            self.assertEqual(len(client.updates), 1)
+        job_id, status, result = client.updates[0]
+        self.assertEqual((job_id, status, result["dispatch_state"]), ("job-1", "running", "executing"))
+        self.assertEqual(result["heartbeat"]["beat"], 1)
+
+    def test_claim_beat_only_for_running_jobs(self) -> None:
+        client = RecordingClient()
+        with Heartbeat(client, "job-1", {"status": "queued"}, 0):
+            pass
+        self.assertEqual(client.updates, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -445,6 +445,10 @@ func NewRouterWithRuntime(service *runtime.Service, daemonInfo DaemonRuntimeInfo
 		handleJobReportRoute(service, w, r)
 	})
 
+	mux.HandleFunc("/api/layer-os/jobs/report/batch", func(w http.ResponseWriter, r *http.Request) {
+		handleJobReportBatchRoute(service, w, r)
+	})
+
 	mux.HandleFunc("/api/layer-os/proposals", func(w http.ResponseWriter, r *http.Request) {
 		handleProposalsRoute(service, w, r)
 	})
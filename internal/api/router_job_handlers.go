@@ -1,6 +1,8 @@
 package api
 
 import (
+	"crypto/sha256"
+	"encoding/hex"
 	"encoding/json"
 	"net/http"
 	"strconv"
@@ -142,9 +144,69 @@ func handleJobPacketRoute(service *runtime.Service, w http.ResponseWriter, r *ht
 		writeError(w, http.StatusBadRequest, err.Error())
 		return
 	}
+	if etag, err := agentRunPacketETag(packet); err == nil {
+		w.Header().Set("ETag", etag)
+		w.Header().Set("Cache-Control", "no-cache")
+		if etagMatches(r.Header.Get("If-None-Match"), etag) {
+			w.WriteHeader(http.StatusNotModified)
+			return
+		}
+	}
 	writeJSON(w, http.StatusOK, packet)
 }
 
+// agentRunPacketETag fingerprints a packet without its generated_at stamps, so
+// re-fetching an unchanged job answers 304 even though every build is fresh.
+// The body still differs in those stamps, hence a weak validator.
+func agentRunPacketETag(packet runtime.AgentRunPacket) (string, error) {
+	raw, err := json.Marshal(packet)
+	if err != nil {
+		return "", err
+	}
+	var tree any
+	if err := json.Unmarshal(raw, &tree); err != nil {
+		return "", err
+	}
+	stripGeneratedAt(tree)
+	canonical, err := json.Marshal(tree)
+	if err != nil {
+		return "", err
+	}
+	sum := sha256.Sum256(canonical)
+	return `W/"` + hex.EncodeToString(sum[:16]) + `"`, nil
+}
+
+func stripGeneratedAt(value any) {
+	switch typed := value.(type) {
+	case map[string]any:
+		delete(typed, "generated_at")
+		for _, item := range typed {
+			stripGeneratedAt(item)
+		}
+	case []any:
+		for _, item := range typed {
+			stripGeneratedAt(item)
+		}
+	}
+}
+
+func etagMatches(header string, etag string) bool {
+	header = strings.TrimSpace(header)
+	if header == "" {
+		return false
+	}
+	if header == "*" {
+		return true
+	}
+	want := strings.TrimPrefix(etag, "W/")
+	for _, candidate := range strings.Split(header, ",") {
+		if strings.TrimPrefix(strings.TrimSpace(candidate), "W/") == want {
+			return true
+		}
+	}
+	return false
+}
+
 func handleJobsRoute(service *runtime.Service, w http.ResponseWriter, r *http.Request) {
 	switch r.Method {
 	case http.MethodGet:
@@ -292,3 +354,31 @@ func handleJobReportRoute(service *runtime.Service, w http.ResponseWriter, r *ht
 	}
 	writeJSON(w, http.StatusOK, item)
 }
+
+const maxAgentJobReportBatch = 200
+
+func handleJobReportBatchRoute(service *runtime.Service, w http.ResponseWriter, r *http.Request) {
+	if r.Method != http.MethodPost {
+		methodNotAllowed(w)
+		return
+	}
+	if !requireWriteAuth(service, w, r) {
+		return
+	}
+	var payload struct {
+		Reports []runtime.AgentJobReportInput `json:"reports"`
+	}
+	if err := json.NewDecoder(r.Body).Decode(&payload); err != nil {
+		writeError(w, http.StatusBadRequest, "invalid agent job report batch payload")
+		return
+	}
+	if len(payload.Reports) == 0 {
+		writeError(w, http.StatusBadRequest, "agent job report batch is empty")
+		return
+	}
+	if len(payload.Reports) > maxAgentJobReportBatch {
+		writeError(w, http.StatusBadRequest, "agent job report batch exceeds "+strconv.Itoa(maxAgentJobReportBatch)+" reports")
+		return
+	}
+	writeJSON(w, http.StatusOK, map[string]any{"items": service.ReportAgentJobBatch(payload.Reports)})
+}
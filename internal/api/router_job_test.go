@@ -7,6 +7,7 @@ import (
 	"net/http/httptest"
 	"os"
 	"path/filepath"
+	"sync"
 	"testing"
 	"time"
 
@@ -347,3 +348,178 @@ func apiTestRepoRoot() (string, error) {
 	}
 	return filepath.Clean(filepath.Join(wd, "..", "..")), nil
 }
+
+func TestReportAgentJobBatchRouteAcknowledgesDuplicates(t *testing.T) {
+	repoRoot, err := apiTestRepoRoot()
+	if err != nil {
+		t.Fatalf("repo root: %v", err)
+	}
+	t.Setenv("LAYER_OS_REPO_ROOT", repoRoot)
+	service, err := runtime.NewService(t.TempDir())
+	if err != nil {
+		t.Fatalf("new service: %v", err)
+	}
+	now := time.Now().UTC()
+	for _, jobID := range []string{"job_batch_001", "job_batch_002"} {
+		if err := service.CreateAgentJob(runtime.AgentJob{JobID: jobID, Kind: "implement", Role: "implementer", Summary: "Batch lane " + jobID, Status: "queued", Source: "founder.manual", Surface: runtime.SurfaceAPI, Stage: runtime.StageCompose, Notes: []string{}, CreatedAt: now, UpdatedAt: now}); err != nil {
+			t.Fatalf("seed job %s: %v", jobID, err)
+		}
+	}
+	router := NewRouter(service)
+	raw := []byte(`{"reports":[` +
+		`{"job_id":"job_batch_001","status":"succeeded","notes":["done"],"result":{"summary":"First batch lane finished.","artifacts":["internal/runtime/service_job_report.go"]}},` +
+		`{"job_id":"job_batch_002","status":"failed","notes":["blocked"],"result":{"summary":"Second batch lane was blocked.","artifacts":[]}},` +
+		`{"job_id":"job_batch_missing","status":"succeeded","notes":[],"result":{"summary":"Unknown lane.","artifacts":[]}}` +
+		`]}`)
+	post := func() []runtime.AgentJobBatchReportItem {
+		req := httptest.NewRequest(http.MethodPost, "/api/layer-os/jobs/report/batch", bytes.NewReader(raw))
+		rec := httptest.NewRecorder()
+		router.ServeHTTP(rec, req)
+		if rec.Code != http.StatusOK {
+			t.Fatalf("expected 200, got %d body=%s", rec.Code, rec.Body.String())
+		}
+		var response struct {
+			Items []runtime.AgentJobBatchReportItem `json:"items"`
+		}
+		if err := json.Unmarshal(rec.Body.Bytes(), &response); err != nil {
+			t.Fatalf("decode batch response: %v", err)
+		}
+		if len(response.Items) != 3 {
+			t.Fatalf("expected 3 batch items, got %+v", response.Items)
+		}
+		return response.Items
+	}
+
+	first := post()
+	if first[0].Outcome != "reported" || first[0].Report == nil || first[0].Report.Job.Status != "succeeded" {
+		t.Fatalf("unexpected first item: %+v", first[0])
+	}
+	if first[1].Outcome != "reported" || first[1].Report == nil || first[1].Report.Job.Status != "failed" {
+		t.Fatalf("unexpected second item: %+v", first[1])
+	}
+	if first[2].Outcome != "rejected" || first[2].Error == "" {
+		t.Fatalf("expected missing job to be rejected, got %+v", first[2])
+	}
+	if _, ok := first[0].Report.Job.Result["report_digest"]; ok {
+		t.Fatalf("expected the report digest to stay off the job result, got %+v", first[0].Report.Job.Result)
+	}
+
+	replay := post()
+	if replay[0].Outcome != "duplicate" || replay[0].Job == nil || replay[1].Outcome != "duplicate" {
+		t.Fatalf("expected replayed reports to be duplicates, got %+v", replay)
+	}
+	if entries := service.ListCapitalizationEntries(); len(entries) != 2 {
+		t.Fatalf("expected one capitalization entry per job, got %+v", entries)
+	}
+
+	raw = []byte(`{"reports":[` +
+		`{"job_id":"job_batch_001","status":"succeeded","notes":["done","amended"],"result":{"summary":"First batch lane finished with amended notes.","artifacts":["internal/runtime/service_job_report.go"]}},` +
+		`{"job_id":"job_batch_002","status":"failed","notes":["blocked"],"result":{"summary":"Second batch lane was blocked.","artifacts":[]}},` +
+		`{"job_id":"job_batch_missing","status":"succeeded","notes":[],"result":{"summary":"Unknown lane.","artifacts":[]}}` +
+		`]}`)
+	amended := post()
+	if amended[0].Outcome != "reported" || amended[0].Report == nil {
+		t.Fatalf("expected a re-report with new notes and result to be applied, got %+v", amended[0])
+	}
+	if amended[1].Outcome != "duplicate" {
+		t.Fatalf("expected the unchanged report to stay a duplicate, got %+v", amended[1])
+	}
+}
+
+func TestReportAgentJobBatchRouteAppliesConcurrentRedeliveryOnce(t *testing.T) {
+	repoRoot, err := apiTestRepoRoot()
+	if err != nil {
+		t.Fatalf("repo root: %v", err)
+	}
+	t.Setenv("LAYER_OS_REPO_ROOT", repoRoot)
+	service, err := runtime.NewService(t.TempDir())
+	if err != nil {
+		t.Fatalf("new service: %v", err)
+	}
+	now := time.Now().UTC()
+	if err := service.CreateAgentJob(runtime.AgentJob{JobID: "job_race_001", Kind: "implement", Role: "implementer", Summary: "Race lane", Status: "queued", Source: "founder.manual", Surface: runtime.SurfaceAPI, Stage: runtime.StageCompose, Notes: []string{}, CreatedAt: now, UpdatedAt: now}); err != nil {
+		t.Fatalf("seed job: %v", err)
+	}
+	inputs := []runtime.AgentJobReportInput{{JobID: "job_race_001", Status: "failed", Notes: []string{"blocked"}, Result: map[string]any{"summary": "Race lane was blocked.", "artifacts": []any{}}}}
+	outcomes := make(chan string, 8)
+	var wg sync.WaitGroup
+	for i := 0; i < cap(outcomes); i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			outcomes <- service.ReportAgentJobBatch(inputs)[0].Outcome
+		}()
+	}
+	wg.Wait()
+	close(outcomes)
+	reported := 0
+	for outcome := range outcomes {
+		if outcome == "reported" {
+			reported++
+		} else if outcome != "duplicate" {
+			t.Fatalf("unexpected outcome %q", outcome)
+		}
+	}
+	if reported != 1 {
+		t.Fatalf("expected exactly one redelivery to be applied, got %d", reported)
+	}
+	if entries := service.ListCapitalizationEntries(); len(entries) != 1 {
+		t.Fatalf("expected one capitalization entry, got %+v", entries)
+	}
+}
+
+func TestReportAgentJobBatchRouteRejectsEmptyBatch(t *testing.T) {
+	service, err := runtime.NewService(t.TempDir())
+	if err != nil {
+		t.Fatalf("new service: %v", err)
+	}
+	router := NewRouter(service)
+	req := httptest.NewRequest(http.MethodPost, "/api/layer-os/jobs/report/batch", bytes.NewReader([]byte(`{"reports":[]}`)))
+	rec := httptest.NewRecorder()
+	router.ServeHTTP(rec, req)
+	if rec.Code != http.StatusBadRequest {
+		t.Fatalf("expected 400, got %d body=%s", rec.Code, rec.Body.String())
+	}
+}
+
+func TestAgentRunPacketRouteHonoursIfNoneMatch(t *testing.T) {
+	service, err := runtime.NewService(t.TempDir())
+	if err != nil {
+		t.Fatalf("new service: %v", err)
+	}
+	now := time.Now().UTC()
+	if err := service.CreateAgentJob(runtime.AgentJob{JobID: "job_etag_001", Kind: "plan", Role: "planner", Summary: "Plan cached lane", Status: "queued", Source: "founder.manual", Surface: runtime.SurfaceAPI, Stage: runtime.StageDiscover, Notes: []string{}, CreatedAt: now, UpdatedAt: now}); err != nil {
+		t.Fatalf("create job: %v", err)
+	}
+	router := NewRouter(service)
+	fetch := func(etag string) *httptest.ResponseRecorder {
+		req := httptest.NewRequest(http.MethodGet, "/api/layer-os/jobs/packet?job_id=job_etag_001", nil)
+		if etag != "" {
+			req.Header.Set("If-None-Match", etag)
+		}
+		rec := httptest.NewRecorder()
+		router.ServeHTTP(rec, req)
+		return rec
+	}
+
+	first := fetch("")
+	etag := first.Header().Get("ETag")
+	if first.Code != http.StatusOK || etag == "" {
+		t.Fatalf("expected 200 with ETag, got %d etag=%q", first.Code, etag)
+	}
+	cached := fetch(etag)
+	if cached.Code != http.StatusNotModified || cached.Body.Len() != 0 {
+		t.Fatalf("expected empty 304 for matching ETag, got %d body=%s", cached.Code, cached.Body.String())
+	}
+	if cached.Header().Get("ETag") != etag {
+		t.Fatalf("expected 304 to repeat ETag %q, got %q", etag, cached.Header().Get("ETag"))
+	}
+
+	if _, err := service.UpdateAgentJob("job_etag_001", "running", []string{"picked_up"}, nil); err != nil {
+		t.Fatalf("update job: %v", err)
+	}
+	changed := fetch(etag)
+	if changed.Code != http.StatusOK || changed.Header().Get("ETag") == etag {
+		t.Fatalf("expected fresh packet after job change, got %d etag=%q", changed.Code, changed.Header().Get("ETag"))
+	}
+}
@@ -76,3 +76,14 @@ func (s *agentJobStore) update(jobID string, status string, notes []string, resu
 	}
 	return AgentJob{}, errors.New("job_id not found")
 }
+
+func (s *agentJobStore) setReportDigest(jobID string, digest string) {
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	for index := range s.items {
+		if s.items[index].JobID == jobID {
+			s.items[index].ReportDigest = digest
+			return
+		}
+	}
+}
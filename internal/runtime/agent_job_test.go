@@ -304,6 +304,33 @@ func TestAgentRunPacketImplementerUsesHandoffSummary(t *testing.T) {
 	}
 }
 
+func TestAgentRunPacketEncodesBulkySectionsLast(t *testing.T) {
+	service, err := NewService(t.TempDir())
+	if err != nil {
+		t.Fatalf("new service: %v", err)
+	}
+	now := time.Now().UTC()
+	if err := service.CreateAgentJob(AgentJob{JobID: "job_order_001", Kind: "plan", Role: "planner", Summary: "Check packet field order", Status: "queued", Source: "founder.manual", Surface: SurfaceAPI, Stage: StageDiscover, Notes: []string{}, CreatedAt: now, UpdatedAt: now}); err != nil {
+		t.Fatalf("create agent job: %v", err)
+	}
+	packet, err := service.AgentRunPacket("job_order_001")
+	if err != nil {
+		t.Fatalf("agent run packet: %v", err)
+	}
+	raw, err := json.Marshal(packet)
+	if err != nil {
+		t.Fatalf("marshal packet: %v", err)
+	}
+	text := string(raw)
+	knowledge := strings.Index(text, `"knowledge":`)
+	for _, key := range []string{`"job":`, `"runtime":`, `"prompting":`} {
+		index := strings.Index(text, key)
+		if index < 0 || index > knowledge {
+			t.Fatalf("expected %s before knowledge in %s", key, text)
+		}
+	}
+}
+
 func TestDefaultJobMutationPolicyFollowsStageAndAllowedPaths(t *testing.T) {
 	cases := []struct {
 		name string
@@ -1,6 +1,9 @@
 package runtime
 
 import (
+	"crypto/sha256"
+	"encoding/hex"
+	"encoding/json"
 	"errors"
 	"fmt"
 	"os"
@@ -9,23 +12,34 @@ import (
 )
 
 func (s *Service) ReportAgentJob(jobID string, status string, notes []string, result map[string]any) (AgentJobReportResult, error) {
+	s.mu.Lock()
+	report, err := s.reportAgentJobLocked(jobID, status, notes, result, "")
+	s.mu.Unlock()
+	if err != nil {
+		return AgentJobReportResult{}, err
+	}
+	return s.finishAgentJobReport(report), nil
+}
+
+// reportAgentJobLocked applies a terminal report and its capitalization and
+// observation side effects. digest is recorded as the job's ReportDigest so
+// batch redeliveries can be recognized; single reports clear it.
+func (s *Service) reportAgentJobLocked(jobID string, status string, notes []string, result map[string]any, digest string) (AgentJobReportResult, error) {
 	if !validAgentJobTerminalStatus(status) {
 		return AgentJobReportResult{}, errors.New("job report status must be terminal")
 	}
-	s.mu.Lock()
 	current, ok := s.agentJob.get(jobID)
 	if !ok {
-		s.mu.Unlock()
 		return AgentJobReportResult{}, errors.New("job_id not found")
 	}
 	normalizedResult, err := normalizeAgentJobReportResult(current, status, result, s.currentActor())
 	if err != nil {
-		s.mu.Unlock()
 		return AgentJobReportResult{}, err
 	}
+	s.agentJob.setReportDigest(jobID, digest)
 	updated, event, err := s.updateAgentJobLocked(jobID, status, notes, normalizedResult, "agent_job."+status)
 	if err != nil {
-		s.mu.Unlock()
+		s.agentJob.setReportDigest(jobID, current.ReportDigest)
 		return AgentJobReportResult{}, err
 	}
 	entry := newAgentJobCapitalizationEntry(updated, event, SummarizeReviewRoom(s.currentReviewRoomLocked()), s.currentActor())
@@ -46,7 +60,13 @@ func (s *Service) ReportAgentJob(jobID string, status string, notes []string, re
 			_ = s.persistLocked()
 		}
 	}
-	s.mu.Unlock()
+	return report, nil
+}
+
+// finishAgentJobReport runs the chain and follow-up steps that take s.mu on
+// their own, after reportAgentJobLocked has released it.
+func (s *Service) finishAgentJobReport(report AgentJobReportResult) AgentJobReportResult {
+	updated := report.Job
 	if chain, err := s.ApplyAgentJobChain(updated); err != nil {
 		report.Warnings = append(report.Warnings, fmt.Sprintf("agent job chain failed: %v", err))
 		s.recordAutomationWarning(agentJobChainFailureReviewItem(updated, err))
@@ -71,7 +91,61 @@ func (s *Service) ReportAgentJob(jobID string, status string, notes []string, re
 		report.Warnings = nil
 	}
 	s.maybeNotifyFounderAttention()
-	return report, nil
+	return report
+}
+
+// ReportAgentJobBatch closes several terminal reports in one call. Each entry
+// is checked and applied in one critical section, and a digest of its status,
+// notes and result is kept as the job's ReportDigest. An entry whose job
+// already carries the same terminal status and digest is acknowledged as a
+// duplicate instead of being re-applied, so spooled workers can redeliver a
+// batch after a lost response, while a re-report with new notes or result
+// still lands.
+func (s *Service) ReportAgentJobBatch(inputs []AgentJobReportInput) []AgentJobBatchReportItem {
+	items := make([]AgentJobBatchReportItem, 0, len(inputs))
+	for _, input := range inputs {
+		jobID := strings.TrimSpace(input.JobID)
+		item := AgentJobBatchReportItem{JobID: jobID}
+		digest := agentJobReportDigest(input)
+		s.mu.Lock()
+		current, ok := s.agentJob.get(jobID)
+		if ok && validAgentJobTerminalStatus(input.Status) && current.Status == input.Status && current.ReportDigest == digest {
+			s.mu.Unlock()
+			item.Outcome = "duplicate"
+			item.Job = &current
+			items = append(items, item)
+			continue
+		}
+		report, err := s.reportAgentJobLocked(jobID, input.Status, input.Notes, input.Result, digest)
+		s.mu.Unlock()
+		if err != nil {
+			item.Outcome = "rejected"
+			item.Error = err.Error()
+		} else {
+			report = s.finishAgentJobReport(report)
+			item.Outcome = "reported"
+			item.Report = &report
+		}
+		items = append(items, item)
+	}
+	return items
+}
+
+func agentJobReportDigest(input AgentJobReportInput) string {
+	notes := input.Notes
+	if notes == nil {
+		notes = []string{}
+	}
+	raw, err := json.Marshal(struct {
+		Status string         `json:"status"`
+		Notes  []string       `json:"notes"`
+		Result map[string]any `json:"result"`
+	}{Status: input.Status, Notes: notes, Result: input.Result})
+	if err != nil {
+		return ""
+	}
+	sum := sha256.Sum256(raw)
+	return hex.EncodeToString(sum[:])
 }
 
 func buildAgentJobReportFollowUp(job AgentJob, warnings []string, chain *AgentJobChainResult) AgentJobFollowUp {
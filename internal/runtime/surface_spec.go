@@ -203,6 +203,7 @@ var canonicalAPIRoutes = []string{
 	`/api/layer-os/jobs/promote`,
 	`/api/layer-os/jobs/update`,
 	`/api/layer-os/jobs/report`,
+	`/api/layer-os/jobs/report/batch`,
 	`/api/layer-os/jobs/dispatch`,
 	`/api/layer-os/work-items`,
 	`/api/layer-os/flows`,
@@ -38,6 +38,9 @@ type AgentJob struct {
 	Notes     []string       `json:"notes"`
 	CreatedAt time.Time      `json:"created_at"`
 	UpdatedAt time.Time      `json:"updated_at"`
+	// ReportDigest fingerprints the last batch report so redeliveries are
+	// acknowledged as duplicates instead of being applied twice.
+	ReportDigest string `json:"report_digest,omitempty"`
 }
 
 type AgentDispatchResult struct {
@@ -61,6 +64,21 @@ type AgentJobReportResult struct {
 	Warnings       []string             `json:"warnings,omitempty"`
 }
 
+type AgentJobReportInput struct {
+	JobID  string         `json:"job_id"`
+	Status string         `json:"status"`
+	Notes  []string       `json:"notes"`
+	Result map[string]any `json:"result"`
+}
+
+type AgentJobBatchReportItem struct {
+	JobID   string                `json:"job_id"`
+	Outcome string                `json:"outcome"`
+	Report  *AgentJobReportResult `json:"report,omitempty"`
+	Job     *AgentJob             `json:"job,omitempty"`
+	Error   string                `json:"error,omitempty"`
+}
+
 type AgentJobPromotionItem struct {
 	SourceKind string               `json:"source_kind"`
 	SourceID   string               `json:"source_id"`
@@ -67,15 +67,17 @@ type HandoffSummary struct {
 }
 
 type AgentRunPacket struct {
-	GeneratedAt    time.Time            `json:"generated_at"`
-	Source         string               `json:"source"`
-	Job            AgentJob             `json:"job"`
-	Runtime        AgentRuntimeContract `json:"runtime"`
-	Knowledge      KnowledgePacket      `json:"knowledge"`
-	Prompting      *PromptingContract   `json:"prompting,omitempty"`
-	Handoff        *HandoffPacket       `json:"handoff,omitempty"`
-	HandoffSummary *HandoffSummary      `json:"handoff_summary,omitempty"`
-	Proposal       *ProposalItem        `json:"proposal,omitempty"`
+	GeneratedAt time.Time            `json:"generated_at"`
+	Source      string               `json:"source"`
+	Job         AgentJob             `json:"job"`
+	Runtime     AgentRuntimeContract `json:"runtime"`
+	Prompting   *PromptingContract   `json:"prompting,omitempty"`
+	Proposal    *ProposalItem        `json:"proposal,omitempty"`
+	// Bulky context stays last so streaming clients can start on the job
+	// and runtime contract before these sections finish arriving.
+	Knowledge      KnowledgePacket `json:"knowledge"`
+	Handoff        *HandoffPacket  `json:"handoff,omitempty"`
+	HandoffSummary *HandoffSummary `json:"handoff_summary,omitempty"`
 }
 
 type AgentRuntimeContract struct {
@@ -1,18 +1,25 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
+import mmap
 import os
+import struct
+from collections.abc import Iterable, Iterator
 from datetime import datetime, timezone
 from pathlib import Path
 
+from legacy_social_style_corpus import CorpusRow, as_text, is_ndjson, iter_ndjson_content, iter_rows, load_rows
+
 
 ROOT = Path(__file__).resolve().parents[1]
 TARGET = ROOT / "docs/brand-home/content/social-style-source.json"
-
-
-def as_text(value: object) -> str:
-    return value.strip() if isinstance(value, str) else ""
+KEY_INDEX_DIR = ROOT / ".cache/social-style"
+KEY_SIZE = 16
+# The index starts with the snapshot size it covers, so a snapshot changed behind its back is re-indexed.
+KEY_INDEX_HEADER = struct.Struct("<Q")
 
 
 def resolve_legacy_source() -> Path:
@@ -25,36 +32,162 @@ def resolve_legacy_source() -> Path:
     )
 
 
-def build_payload(source_path: Path) -> dict[str, object]:
-    data = json.loads(source_path.read_text(encoding="utf-8"))
-    rows: list[dict[str, str]] = []
-    for item in data.get("published_content", []):
-        excerpt = as_text(item.get("instagram_caption_preview"))
-        if not excerpt:
-            continue
-        rows.append(
-            {
-                "signal_id": as_text(item.get("signal_id")),
-                "published_at": as_text(item.get("published_at")),
-                "instagram_caption_preview": excerpt,
-            }
-        )
+def resolve_target() -> Path:
+    explicit = as_text(os.getenv("LEGACY_SOCIAL_STYLE_TARGET"))
+    if explicit:
+        return Path(explicit).expanduser()
+    return TARGET
+
+
+def snapshot_header(source_path: Path) -> dict[str, str]:
     return {
         "source_mode": "legacy_absorbed_snapshot",
         "source_path": str(source_path),
         "generated_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-        "published_content": rows,
     }
 
 
+def snapshot_record(row: CorpusRow) -> dict[str, str]:
+    return {
+        "signal_id": row.signal_id,
+        "published_at": row.published_at,
+        "instagram_caption_preview": row.caption,
+    }
+
+
+def build_snapshot(rows: list[CorpusRow], source_path: Path) -> dict[str, object]:
+    return {
+        **snapshot_header(source_path),
+        "published_content": [snapshot_record(row) for row in rows],
+    }
+
+
+def render_snapshot(payload: dict[str, object]) -> str:
+    return json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+
+
+def build_payload(source_path: Path) -> dict[str, object]:
+    return build_snapshot(load_rows(source_path), source_path)
+
+
+def record_key(record: dict[str, object]) -> bytes:
+    fields = (as_text(record.get(name)) for name in ("signal_id", "published_at", "instagram_caption_preview"))
+    return hashlib.blake2b("\0".join(fields).encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+def key_index_path(target: Path) -> Path:
+    name = hashlib.blake2b(str(target.resolve()).encode("utf-8"), digest_size=8).hexdigest()
+    return KEY_INDEX_DIR / f"absorb-{name}.keys"
+
+
+def write_key_index(path: Path, covered: int, keys: Iterable[bytes]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    with temp_path.open("wb") as handle:
+        handle.write(KEY_INDEX_HEADER.pack(covered))
+        for key in keys:
+            handle.write(key)
+    temp_path.replace(path)
+
+
+def iter_index_keys(path: Path) -> Iterator[bytes]:
+    with path.open("rb") as handle:
+        handle.seek(KEY_INDEX_HEADER.size)
+        while key := handle.read(KEY_SIZE):
+            yield key
+
+
+def fresh_key_index(target: Path) -> Path:
+    """Return the sorted digest index of the snapshot's rows, rebuilding it if it is stale.
+
+    Only a rebuild holds every digest in memory to sort it; normal appends
+    search the index in place and merge new digests into it as a stream.
+    """
+    path = key_index_path(target)
+    covered = target.stat().st_size if target.exists() else 0
+    if path.exists():
+        with path.open("rb") as handle:
+            header = handle.read(KEY_INDEX_HEADER.size)
+        if len(header) == KEY_INDEX_HEADER.size and KEY_INDEX_HEADER.unpack(header)[0] == covered:
+            return path
+    keys = sorted({record_key(item) for item in iter_ndjson_content(target)}) if covered else []
+    write_key_index(path, covered, keys)
+    return path
+
+
+def index_contains(index: mmap.mmap, key: bytes) -> bool:
+    low, high = 0, (len(index) - KEY_INDEX_HEADER.size) // KEY_SIZE
+    while low < high:
+        middle = (low + high) // 2
+        start = KEY_INDEX_HEADER.size + middle * KEY_SIZE
+        probe = index[start:start + KEY_SIZE]
+        if probe == key:
+            return True
+        if probe < key:
+            low = middle + 1
+        else:
+            high = middle
+    return False
+
+
+def append_ndjson_snapshot(rows: Iterable[CorpusRow], source_path: Path, target: Path) -> int:
+    # Rows the snapshot already holds are skipped, so re-absorbing an export is a no-op like a rewrite.
+    # Known rows are looked up in the sorted digest index on disk; only this batch's new digests stay in memory.
+    index_path = fresh_key_index(target)
+    added: set[bytes] = set()
+    count = 0
+    with index_path.open("rb") as index_file, mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index:
+        with target.open("a", encoding="utf-8") as handle:
+            for row in rows:
+                record = snapshot_record(row)
+                key = record_key(record)
+                if key in added or index_contains(index, key):
+                    continue
+                added.add(key)
+                if not count:
+                    handle.write(json.dumps(snapshot_header(source_path), ensure_ascii=False) + "\n")
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+    write_key_index(index_path, target.stat().st_size, heapq.merge(iter_index_keys(index_path), sorted(added)))
+    return count
+
+
+def write_ndjson_snapshot(rows: Iterable[CorpusRow], source_path: Path, target: Path, append: bool) -> int:
+    # Rows are written as they stream in, so a large legacy export never sits in memory.
+    if append:
+        return append_ndjson_snapshot(rows, source_path, target)
+    temp_path = target.with_suffix(target.suffix + ".tmp")
+    count = 0
+    with temp_path.open("w", encoding="utf-8") as handle:
+        handle.write(json.dumps(snapshot_header(source_path), ensure_ascii=False) + "\n")
+        for row in rows:
+            handle.write(json.dumps(snapshot_record(row), ensure_ascii=False) + "\n")
+            count += 1
+    temp_path.replace(target)
+    # A rewrite starts a new snapshot; the next append rebuilds the index from it.
+    key_index_path(target).unlink(missing_ok=True)
+    return count
+
+
+def write_snapshot(rows: Iterable[CorpusRow], source_path: Path, target: Path, append: bool = False) -> int:
+    if is_ndjson(target):
+        return write_ndjson_snapshot(rows, source_path, target, append)
+    if append:
+        raise SystemExit(f"appending needs an .ndjson snapshot target: {target}")
+    payload = build_snapshot(list(rows), source_path)
+    target.write_text(render_snapshot(payload), encoding="utf-8")
+    return len(payload["published_content"])
+
+
 def main() -> None:
     source_path = resolve_legacy_source()
     if not source_path.exists():
         raise SystemExit(f"social style source missing: {source_path}")
-    payload = build_payload(source_path)
-    TARGET.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    print(f"examples={len(payload['published_content'])}")
-    print(f"target={TARGET}")
+    target = resolve_target()
+    append = os.getenv("LEGACY_SOCIAL_STYLE_APPEND") == "1"
+    count = write_snapshot(iter_rows(source_path), source_path, target, append)
+    print(f"examples={count}")
+    print(f"target={target}")
 
 
 if __name__ == "__main__":
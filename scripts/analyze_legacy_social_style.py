@@ -1,16 +1,26 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import hashlib
+import heapq
 import json
 import os
 import re
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
+from legacy_social_style_corpus import CorpusRow, load_rows, manifest_key, publish_module
+
 
 ROOT = Path(__file__).resolve().parents[1]
 LOCAL_SOURCE = ROOT / "docs/brand-home/content/social-style-source.json"
 TARGET = ROOT / "docs/brand-home/content/social-style-analysis.generated.js"
+BUILDER = "scripts/analyze_legacy_social_style.py"
+FEATURE_CACHE = ROOT / ".cache/social-style/features.json"
+DEFAULT_CHUNK_SIZE = 500
+PARALLEL_MIN_ROWS = 2000
 
 THEME_RULES = {
     "subtraction": ["덜어", "비워", "여백", "본질"],
@@ -42,13 +52,66 @@ STOPWORDS = {
     "하게",
 }
 
+QUESTION_TOKENS = ["?", "무엇", "어디", "일까"]
+QUESTION_LABEL = "question"
+TOKEN_PATTERN = re.compile(r"[가-힣]{2,}")
+
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher over every theme needle and question token.
+
+    Each excerpt is walked once and comes back as the set of labels whose
+    needles occur in it, instead of one substring scan per needle per theme.
+    """
+
+    def __init__(self, patterns: dict[str, list[str]]) -> None:
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.labels = frozenset(patterns)
+        pending: list[set[str]] = [set()]
+        for label, needles in patterns.items():
+            for needle in needles:
+                state = 0
+                for char in needle:
+                    next_state = self.goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self.goto)
+                        self.goto[state][char] = next_state
+                        self.goto.append({})
+                        self.fail.append(0)
+                        pending.append(set())
+                    state = next_state
+                pending[state].add(label)
+        queue = deque(self.goto[0].values())
+        order: list[int] = []
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                queue.append(next_state)
+        self.output: list[frozenset[str]] = [frozenset()] * len(self.goto)
+        for state in order:
+            self.output[state] = frozenset(pending[state] | self.output[self.fail[state]])
 
-def as_text(value: object) -> str:
-    return value.strip() if isinstance(value, str) else ""
+    def match(self, text: str) -> set[str]:
+        found: set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            if self.output[state]:
+                found |= self.output[state]
+                if len(found) == len(self.labels):
+                    break
+        return found
 
 
-def normalize_excerpt(value: str) -> str:
-    return " ".join(value.replace("\r", "\n").split())
+MATCHER = KeywordAutomaton({**THEME_RULES, QUESTION_LABEL: QUESTION_TOKENS})
 
 
 def resolve_source() -> Path:
@@ -58,57 +121,217 @@ def resolve_source() -> Path:
     return LOCAL_SOURCE
 
 
-def load_rows(source_path: Path) -> list[dict[str, str]]:
-    data = json.loads(source_path.read_text(encoding="utf-8"))
-    rows: list[dict[str, str]] = []
-    for index, item in enumerate(data.get("published_content", []), start=1):
-        excerpt = normalize_excerpt(as_text(item.get("instagram_caption_preview")))
-        if not excerpt:
+def resolve_feature_cache() -> Path | None:
+    explicit = os.getenv("SOCIAL_STYLE_FEATURE_CACHE")
+    if explicit == "off":
+        return None
+    if explicit:
+        return Path(explicit).expanduser()
+    return FEATURE_CACHE
+
+
+def env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        raise SystemExit(f"{name} must be a positive integer: {raw}") from None
+
+
+def open_feature_cache() -> FeatureCache:
+    path = resolve_feature_cache()
+    workers = env_int("SOCIAL_STYLE_WORKERS", os.cpu_count() or 1)
+    chunk_size = env_int("SOCIAL_STYLE_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+    if path is None:
+        return FeatureCache(None, workers, chunk_size)
+    return FeatureCache.load(path, workers, chunk_size)
+
+
+def feature_key(row: CorpusRow) -> str:
+    digest = hashlib.sha256(row.excerpt.encode("utf-8")).hexdigest()[:20]
+    return f"{row.signal_id}:{digest}"
+
+
+def excerpt_features(excerpt: str) -> dict[str, object]:
+    tokens: Counter[str] = Counter()
+    for token in TOKEN_PATTERN.findall(excerpt):
+        if token in STOPWORDS:
             continue
-        rows.append(
-            {
-                "exampleId": f"legacy-ig-{index:02d}",
-                "signalId": as_text(item.get("signal_id")),
-                "publishedAt": as_text(item.get("published_at")),
-                "excerpt": excerpt,
-            }
-        )
-    return rows
+        tokens[token] += 1
+    return {
+        "tokens": dict(tokens),
+        "labels": sorted(MATCHER.match(excerpt)),
+        "length": len(excerpt),
+    }
+
+
+def features_chunk(excerpts: list[str]) -> list[dict[str, object]]:
+    return [excerpt_features(excerpt) for excerpt in excerpts]
+
+
+def compute_features(
+    excerpts: list[str],
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[dict[str, object]]:
+    # Small batches (the usual append of a few posts) stay serial; pool startup would dominate.
+    chunk_size = max(1, chunk_size)
+    if workers <= 1 or len(excerpts) < max(PARALLEL_MIN_ROWS, chunk_size * 2):
+        return features_chunk(excerpts)
+    chunks = [excerpts[start : start + chunk_size] for start in range(0, len(excerpts), chunk_size)]
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            return [features for part in pool.map(features_chunk, chunks) for features in part]
+    except (OSError, BrokenProcessPool):
+        return features_chunk(excerpts)
+
+
+def rules_fingerprint() -> str:
+    rules = [THEME_RULES, QUESTION_TOKENS, sorted(STOPWORDS), TOKEN_PATTERN.pattern]
+    return hashlib.sha256(json.dumps(rules, ensure_ascii=False).encode("utf-8")).hexdigest()
+
 
+class FeatureCache:
+    """Per-row features keyed by signal id plus excerpt hash, with running aggregates.
 
-def match_theme(excerpt: str, needles: list[str]) -> bool:
-    return any(needle in excerpt for needle in needles)
+    sync() only computes features for rows it has not seen and folds the
+    difference into the aggregates, so appending a few captions to a long
+    history costs a few rows of work. Without a path it is a plain in-memory
+    pass over the rows.
+    """
 
+    def __init__(self, path: Path | None = None, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.path = path
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.features: dict[str, dict[str, object]] = {}
+        self.included: Counter[str] = Counter()
+        self.keywords: Counter[str] = Counter()
+        self.themes: Counter[str] = Counter()
+        self.total_length = 0
+        self.rows: list[CorpusRow] | None = None
+        self.current: list[dict[str, object]] = []
+        self.computed = 0
+        self.reused = 0
 
-def theme_summary(rows: list[dict[str, str]]) -> list[dict[str, object]]:
+    @classmethod
+    def load(cls, path: Path, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> FeatureCache:
+        cache = cls(path, workers, chunk_size)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cache
+        if not isinstance(data, dict) or data.get("rules") != rules_fingerprint():
+            return cache
+        features = data.get("features", {})
+        included = Counter(data.get("included", {}))
+        if not all(key in features for key in included):
+            return cache
+        cache.features = features
+        cache.included = included
+        cache.keywords = Counter(data.get("keywords", {}))
+        cache.themes = Counter(data.get("themes", {}))
+        cache.total_length = int(data.get("totalLength", 0))
+        return cache
+
+    def apply(self, features: dict[str, object], times: int) -> None:
+        for token, count in features["tokens"].items():
+            self.keywords[token] += count * times
+        for label in features["labels"]:
+            self.themes[label] += times
+        self.total_length += int(features["length"]) * times
+
+    def sync(self, rows: list[CorpusRow]) -> list[dict[str, object]]:
+        keys = [feature_key(row) for row in rows]
+        wanted = Counter(keys)
+        for key, times in (self.included - wanted).items():
+            self.apply(self.features[key], -times)
+        missing: dict[str, str] = {}
+        for row, key in zip(rows, keys):
+            if key in self.features or key in missing:
+                self.reused += 1
+                continue
+            missing[key] = row.excerpt
+        computed = compute_features(list(missing.values()), self.workers, self.chunk_size)
+        self.features.update(zip(missing, computed))
+        self.computed += len(computed)
+        for key, times in (wanted - self.included).items():
+            self.apply(self.features[key], times)
+        self.included = wanted
+        self.features = {key: self.features[key] for key in wanted}
+        self.keywords = +self.keywords
+        self.themes = +self.themes
+        self.rows = rows
+        self.current = [self.features[key] for key in keys]
+        return self.current
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        payload = {
+            "rules": rules_fingerprint(),
+            "features": self.features,
+            "included": dict(self.included),
+            "keywords": dict(self.keywords),
+            "themes": dict(self.themes),
+            "totalLength": self.total_length,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        temp_path.replace(self.path)
+
+
+def synced_cache(rows: list[CorpusRow], cache: FeatureCache | None) -> FeatureCache:
+    if cache is None:
+        cache = FeatureCache()
+    if cache.rows is not rows:
+        cache.sync(rows)
+    return cache
+
+
+def theme_summary(rows: list[CorpusRow], cache: FeatureCache | None = None) -> list[dict[str, object]]:
+    cache = synced_cache(rows, cache)
+    matches: dict[str, list[CorpusRow]] = {theme_id: [] for theme_id in THEME_RULES}
+    pending = set(THEME_RULES)
+    for row, features in zip(rows, cache.current):
+        if not pending:
+            break
+        for theme_id in features["labels"]:
+            if theme_id in pending:
+                matches[theme_id].append(row)
+                if len(matches[theme_id]) == 3:
+                    pending.discard(theme_id)
     summary: list[dict[str, object]] = []
     for theme_id, needles in THEME_RULES.items():
-        matches = [row for row in rows if match_theme(row["excerpt"], needles)]
         summary.append(
             {
                 "themeId": theme_id,
-                "hits": len(matches),
-                "coverage": round(len(matches) / max(1, len(rows)), 3),
+                "hits": cache.themes[theme_id],
+                "coverage": round(cache.themes[theme_id] / max(1, len(rows)), 3),
                 "signals": needles,
                 "examples": [
                     {
-                        "exampleId": row["exampleId"],
-                        "signalId": row["signalId"],
-                        "excerpt": row["excerpt"][:160] + ("…" if len(row["excerpt"]) > 160 else ""),
+                        "exampleId": row.example_id,
+                        "signalId": row.signal_id,
+                        "excerpt": row.preview(160),
                     }
-                    for row in matches[:3]
+                    for row in matches[theme_id]
                 ],
             }
         )
     return sorted(summary, key=lambda item: int(item["hits"]), reverse=True)
 
 
-def rhetorical_summary(rows: list[dict[str, str]]) -> dict[str, object]:
+def rhetorical_summary(rows: list[CorpusRow], cache: FeatureCache | None = None) -> dict[str, object]:
+    cache = synced_cache(rows, cache)
     question_like = 0
     average_length = 0.0
     if rows:
-        question_like = sum(1 for row in rows if any(token in row["excerpt"] for token in ["?", "무엇", "어디", "일까"]))
-        average_length = round(sum(len(row["excerpt"]) for row in rows) / len(rows), 1)
+        question_like = cache.themes[QUESTION_LABEL]
+        average_length = round(cache.total_length / len(rows), 1)
     return {
         "questionLikeRate": round(question_like / max(1, len(rows)), 3),
         "averageExcerptLength": average_length,
@@ -121,21 +344,32 @@ def rhetorical_summary(rows: list[dict[str, str]]) -> dict[str, object]:
     }
 
 
-def keyword_summary(rows: list[dict[str, str]]) -> list[dict[str, object]]:
-    counter: Counter[str] = Counter()
-    for row in rows:
-        for token in re.findall(r"[가-힣]{2,}", row["excerpt"]):
-            if token in STOPWORDS:
-                continue
-            counter[token] += 1
+def keyword_summary(rows: list[CorpusRow], cache: FeatureCache | None = None) -> list[dict[str, object]]:
+    cache = synced_cache(rows, cache)
+    counts = cache.keywords
+    if not counts:
+        return []
+    threshold = heapq.nlargest(12, counts.values())[-1]
+    contenders = {token for token, count in counts.items() if count >= threshold}
+    # Ties keep first-appearance order, the same order Counter.most_common gives a full rescan.
+    first_seen: dict[str, int] = {}
+    for features in cache.current:
+        for token in features["tokens"]:
+            if token in contenders and token not in first_seen:
+                first_seen[token] = len(first_seen)
+        if len(first_seen) == len(contenders):
+            break
+    ranked = sorted(contenders, key=lambda token: (-counts[token], first_seen[token]))
     return [
-        {"keyword": keyword, "count": count}
-        for keyword, count in counter.most_common(12)
+        {"keyword": keyword, "count": counts[keyword]}
+        for keyword in ranked[:12]
     ]
 
 
-def build_payload(rows: list[dict[str, str]]) -> dict[str, object]:
-    themes = theme_summary(rows)
+def build_payload(rows: list[CorpusRow], cache: FeatureCache | None = None) -> dict[str, object]:
+    cache = FeatureCache() if cache is None else cache
+    cache.sync(rows)
+    themes = theme_summary(rows, cache)
     top_theme_ids = [item["themeId"] for item in themes[:4]]
     return {
         "summary": {
@@ -149,16 +383,16 @@ def build_payload(rows: list[dict[str, str]]) -> dict[str, object]:
             "dominantThemes": top_theme_ids,
         },
         "themes": themes,
-        "rhetoric": rhetorical_summary(rows),
-        "keywords": keyword_summary(rows),
+        "rhetoric": rhetorical_summary(rows, cache),
+        "keywords": keyword_summary(rows, cache),
     }
 
 
 def render_module(payload: dict[str, object], source_path: Path) -> str:
     return (
         "// Generated from the repo-local social style snapshot.\n"
-        "// Builder: scripts/analyze_legacy_social_style.py\n"
-        f"// Source: {source_path}\n"
+        f"// Builder: {BUILDER}\n"
+        f"// Source: {manifest_key(source_path)}\n"
         f"export const socialStyleAnalysis = {json.dumps(payload, ensure_ascii=False, indent=2)};\n"
         "export default socialStyleAnalysis;\n"
     )
@@ -169,11 +403,15 @@ def main() -> None:
     if not source_path.exists():
         raise SystemExit(f"social style source missing: {source_path}")
     rows = load_rows(source_path)
-    payload = build_payload(rows)
-    TARGET.write_text(render_module(payload, source_path), encoding="utf-8")
+    cache = open_feature_cache()
+    payload = build_payload(rows, cache)
+    cache.save()
+    changed = publish_module(TARGET, render_module(payload, source_path), source_path, BUILDER)
     print(f"examples={len(rows)}")
+    print(f"features_computed={cache.computed} features_reused={cache.reused}")
     print(f"source={source_path}")
     print(f"target={TARGET}")
+    print(f"changed={str(changed).lower()}")
     print(f"dominant_themes={','.join(payload['summary']['dominantThemes'])}")
 
 
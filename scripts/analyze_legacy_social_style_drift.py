@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import json
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from analyze_legacy_social_style import (
+    QUESTION_LABEL,
+    THEME_RULES,
+    FeatureCache,
+    open_feature_cache,
+    resolve_source,
+    synced_cache,
+)
+from legacy_social_style_corpus import CorpusRow, load_rows, manifest_key, publish_module
+
+
+ROOT = Path(__file__).resolve().parents[1]
+TARGET = ROOT / "docs/brand-home/content/social-style-drift.generated.js"
+BUILDER = "scripts/analyze_legacy_social_style_drift.py"
+ROLLING_DAYS = 28
+TOP_KEYWORDS = 5
+
+
+def parse_published_at(value: str) -> datetime | None:
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def week_bucket(moment: datetime) -> tuple[str, datetime]:
+    year, week, _ = moment.isocalendar()
+    start = datetime(moment.year, moment.month, moment.day) - timedelta(days=moment.weekday())
+    return f"{year}-W{week:02d}", start
+
+
+def month_bucket(moment: datetime) -> tuple[str, datetime]:
+    return f"{moment.year}-{moment.month:02d}", datetime(moment.year, moment.month, 1)
+
+
+class WindowStats:
+    """Running theme, question, length and keyword totals for one slice of rows.
+
+    Rows can be removed again, which is what lets the rolling window slide
+    forward without re-reading the rows it already covers.
+    """
+
+    def __init__(self) -> None:
+        self.examples = 0
+        self.total_length = 0
+        self.labels: Counter[str] = Counter()
+        self.keywords: Counter[str] = Counter()
+
+    def add(self, features: dict[str, object], times: int = 1) -> None:
+        self.examples += times
+        self.total_length += int(features["length"]) * times
+        for label in features["labels"]:
+            self.labels[label] += times
+        for token, count in features["tokens"].items():
+            self.keywords[token] += count * times
+
+    def remove(self, features: dict[str, object]) -> None:
+        self.add(features, -1)
+        for token in features["tokens"]:
+            if self.keywords[token] <= 0:
+                del self.keywords[token]
+
+    def summary(self) -> dict[str, object]:
+        examples = max(1, self.examples)
+        keywords = self.keywords.most_common(TOP_KEYWORDS)
+        return {
+            "examples": self.examples,
+            "themeCoverage": {theme_id: round(self.labels[theme_id] / examples, 3) for theme_id in THEME_RULES},
+            "questionLikeRate": round(self.labels[QUESTION_LABEL] / examples, 3),
+            "averageExcerptLength": round(self.total_length / examples, 1),
+            "topKeywords": [{"keyword": keyword, "count": count} for keyword, count in keywords],
+        }
+
+
+def build_payload(rows: list[CorpusRow], cache: FeatureCache | None = None, rolling_days: int = ROLLING_DAYS) -> dict[str, object]:
+    features = synced_cache(rows, cache).current
+    dated: list[tuple[datetime, int, CorpusRow, dict[str, object]]] = []
+    for position, (row, row_features) in enumerate(zip(rows, features)):
+        moment = parse_published_at(row.published_at)
+        if moment is not None:
+            dated.append((moment, position, row, row_features))
+    dated.sort(key=lambda item: (item[0], item[1]))
+
+    weekly: list[dict[str, object]] = []
+    monthly: list[dict[str, object]] = []
+    rolling: list[dict[str, object]] = []
+    window = WindowStats()
+    in_window: deque[tuple[datetime, dict[str, object]]] = deque()
+    span = timedelta(days=rolling_days)
+    open_buckets: dict[str, tuple[str, datetime, WindowStats]] = {}
+
+    def close_bucket(kind: str, output: list[dict[str, object]]) -> None:
+        key, start, stats = open_buckets.pop(kind)
+        output.append({"bucket": key, "start": start.date().isoformat(), **stats.summary()})
+
+    def emit_rolling(end: datetime) -> None:
+        while in_window and in_window[0][0] < end - span:
+            window.remove(in_window.popleft()[1])
+        rolling.append(
+            {
+                "start": (end - span).date().isoformat(),
+                "end": (end - timedelta(days=1)).date().isoformat(),
+                **window.summary(),
+            }
+        )
+
+    # One pass in publish order: calendar buckets close when the key changes, and the
+    # rolling window is sampled at each week boundary before the next week's rows land.
+    for moment, _, _, row_features in dated:
+        for kind, output, bucket in (("week", weekly, week_bucket), ("month", monthly, month_bucket)):
+            key, start = bucket(moment)
+            current = open_buckets.get(kind)
+            if current is not None and current[0] != key:
+                if kind == "week":
+                    emit_rolling(current[1] + timedelta(days=7))
+                close_bucket(kind, output)
+            if kind not in open_buckets:
+                open_buckets[kind] = (key, start, WindowStats())
+            open_buckets[kind][2].add(row_features)
+        window.add(row_features)
+        in_window.append((moment, row_features))
+    if "week" in open_buckets:
+        emit_rolling(open_buckets["week"][1] + timedelta(days=7))
+        close_bucket("week", weekly)
+    if "month" in open_buckets:
+        close_bucket("month", monthly)
+
+    signals: dict[str, tuple[WindowStats, list[str]]] = {}
+    for row, row_features in zip(rows, features):
+        stats, published = signals.setdefault(row.signal_id, (WindowStats(), []))
+        stats.add(row_features)
+        if row.published_at:
+            published.append(row.published_at)
+    signal_summary = [
+        {
+            "signalId": signal_id,
+            "firstPublishedAt": min(published) if published else "",
+            "lastPublishedAt": max(published) if published else "",
+            **stats.summary(),
+        }
+        for signal_id, (stats, published) in signals.items()
+    ]
+    signal_summary.sort(key=lambda item: int(item["examples"]), reverse=True)
+
+    return {
+        "summary": {
+            "sourceExamples": len(rows),
+            "datedExamples": len(dated),
+            "firstPublishedAt": dated[0][2].published_at if dated else "",
+            "lastPublishedAt": dated[-1][2].published_at if dated else "",
+            "rollingWindowDays": rolling_days,
+        },
+        "weekly": weekly,
+        "monthly": monthly,
+        "rolling": rolling,
+        "signals": signal_summary,
+    }
+
+
+def render_module(payload: dict[str, object], source_path: Path) -> str:
+    return (
+        "// Generated from the repo-local social style snapshot.\n"
+        f"// Builder: {BUILDER}\n"
+        f"// Source: {manifest_key(source_path)}\n"
+        f"export const socialStyleDrift = {json.dumps(payload, ensure_ascii=False, indent=2)};\n"
+        "export default socialStyleDrift;\n"
+    )
+
+
+def main() -> None:
+    source_path = resolve_source()
+    if not source_path.exists():
+        raise SystemExit(f"social style source missing: {source_path}")
+    rows = load_rows(source_path)
+    cache = open_feature_cache()
+    payload = build_payload(rows, cache)
+    cache.save()
+    changed = publish_module(TARGET, render_module(payload, source_path), source_path, BUILDER)
+    print(f"examples={len(rows)}")
+    print(f"weeks={len(payload['weekly'])} months={len(payload['monthly'])} signals={len(payload['signals'])}")
+    print(f"source={source_path}")
+    print(f"target={TARGET}")
+    print(f"changed={str(changed).lower()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import absorb_legacy_social_style_source as absorb
+import analyze_legacy_social_style as analyze
+import analyze_legacy_social_style_drift as drift
+import import_legacy_social_style as examples_import
+import legacy_social_style_similarity as similarity
+import vectorize_legacy_social_style as vectorize
+from legacy_social_style_corpus import as_text, load_rows, publish_module, renumber_rows
+
+
+def main() -> None:
+    # One parse feeds every output. With LEGACY_SOCIAL_STYLE_SOURCE set, the snapshot is
+    # absorbed first and the modules are built from it, same as running the three scripts in turn.
+    legacy = as_text(os.getenv("LEGACY_SOCIAL_STYLE_SOURCE"))
+    source_path = Path(legacy).expanduser() if legacy else examples_import.resolve_source()
+    if not source_path.exists():
+        raise SystemExit(f"social style source missing: {source_path}")
+    rows = load_rows(source_path)
+
+    if legacy:
+        target = absorb.resolve_target()
+        append = os.getenv("LEGACY_SOCIAL_STYLE_APPEND") == "1"
+        absorb.write_snapshot(rows, source_path, target, append)
+        print(f"snapshot={target}")
+        # An appended snapshot also holds earlier batches, so it has to be read back.
+        rows = load_rows(target) if append else renumber_rows(rows)
+        source_path = target
+
+    examples = examples_import.build_examples(rows)
+    index = similarity.SimilarityIndex.build(rows)
+    threads = examples_import.select_threads(rows, examples, index)
+    examples_text = examples_import.render_module(examples, source_path, threads)
+    examples_changed = publish_module(examples_import.TARGET, examples_text, source_path, examples_import.BUILDER)
+    cache = analyze.open_feature_cache()
+    payload = analyze.build_payload(rows, cache)
+    drift_payload = drift.build_payload(rows, cache)
+    blocks = vectorize.build_vectors(rows, cache)
+    cache.save()
+    analysis_text = analyze.render_module(payload, source_path)
+    analysis_changed = publish_module(analyze.TARGET, analysis_text, source_path, analyze.BUILDER)
+    drift_text = drift.render_module(drift_payload, source_path)
+    drift_changed = publish_module(drift.TARGET, drift_text, source_path, drift.BUILDER)
+    index_target = similarity.resolve_target()
+    index_changed = publish_module(index_target, index.encode(), source_path, similarity.BUILDER, sidecar=True)
+    vectors_target = vectorize.resolve_target()
+    vectors_changed = publish_module(vectors_target, vectorize.encode_sidecar(rows, blocks), source_path, vectorize.BUILDER, sidecar=True)
+
+    print(f"examples={len(rows)}")
+    print(f"features_computed={cache.computed} features_reused={cache.reused}")
+    print(f"source={source_path}")
+    print(f"examples_target={examples_import.TARGET} changed={str(examples_changed).lower()}")
+    print(f"analysis_target={analyze.TARGET} changed={str(analysis_changed).lower()}")
+    print(f"drift_target={drift.TARGET} changed={str(drift_changed).lower()}")
+    print(f"vectors_target={vectors_target} changed={str(vectors_changed).lower()}")
+    print(f"similarity_target={index_target} changed={str(index_changed).lower()}")
+    print(f"dominant_themes={','.join(payload['summary']['dominantThemes'])}")
+
+
+if __name__ == "__main__":
+    main()
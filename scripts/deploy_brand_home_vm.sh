@@ -27,15 +27,21 @@ NODE_VERSION="${LAYER_OS_WEB_NODE_VERSION:-$(node -p 'process.versions.node')}"
 RELEASE_STAMP="$(date -u +%Y%m%d_%H%M%S)"
 CHECK_ONLY=0
 RESTART_SERVICE=1
+STYLE_GATE=0
+STYLE_MANIFEST_TOOL="${ROOT_DIR}/scripts/social_style_manifest.py"
 NEEDS_ENV_SEED=1
 REMOTE_NODE_INSTALLED=0
 
 usage() {
   cat >&2 <<'EOF'
-usage: deploy_brand_home_vm.sh [--host <ssh-host>] [--user <remote-user>] [--port <port>] [--ssh-key <path>] [--node-version <version>] [--release-stamp <stamp>] [--check] [--no-restart]
+usage: deploy_brand_home_vm.sh [--host <ssh-host>] [--user <remote-user>] [--port <port>] [--ssh-key <path>] [--node-version <version>] [--release-stamp <stamp>] [--check] [--no-restart] [--if-style-changed]
 
 Build the founder/admin web as a Next standalone bundle, sync it to the VM,
 install a matching Linux Node runtime, and restart the remote web service.
+
+--if-style-changed exits before building when no generated social style output
+changed since the last successful deploy (see .cache/social-style/manifest.json).
+Use it for deploys triggered only by the social style pipeline.
 EOF
 }
 
@@ -122,6 +128,10 @@ while [[ "$#" -gt 0 ]]; do
       RESTART_SERVICE=0
       shift
       ;;
+    --if-style-changed)
+      STYLE_GATE=1
+      shift
+      ;;
     -h|--help)
       usage
       exit 0
@@ -368,6 +378,30 @@ verify_remote_health() {
   "
 }
 
+style_outputs_changed() {
+  local status=0
+  python3 "${STYLE_MANIFEST_TOOL}" changed --consumer deploy || status=$?
+  case "${status}" in
+    0) return 0 ;;
+    3) return 1 ;;
+    *) die "social style manifest check failed (exit ${status})" ;;
+  esac
+}
+
+mark_style_published() {
+  if command -v python3 >/dev/null 2>&1; then
+    python3 "${STYLE_MANIFEST_TOOL}" mark --consumer deploy || note "warning: could not record deployed social style outputs"
+  fi
+}
+
+if [[ "${STYLE_GATE}" -eq 1 ]]; then
+  require_cmd python3
+  if ! style_outputs_changed; then
+    note "social style outputs unchanged since last deploy; skipping"
+    exit 0
+  fi
+fi
+
 build_web
 detect_remote_env
 detect_remote_node_runtime
@@ -390,6 +424,7 @@ sync_bundle
 install_remote_release
 restart_remote_service
 verify_remote_health
+mark_style_published
 
 note "remote current -> ${REMOTE_RELEASE_DIR}"
 note "service=${REMOTE_SERVICE_NAME}"
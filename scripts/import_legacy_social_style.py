@@ -5,19 +5,15 @@ import json
 import os
 from pathlib import Path
 
+from legacy_social_style_corpus import CorpusRow, load_rows, manifest_key, publish_module
+from legacy_social_style_similarity import SimilarityIndex
+
 
 ROOT = Path(__file__).resolve().parents[1]
 LOCAL_SOURCE = ROOT / "docs/brand-home/content/social-style-source.json"
 TARGET = ROOT / "docs/brand-home/content/social-style-examples.generated.js"
-
-
-def as_text(value: object) -> str:
-    return value.strip() if isinstance(value, str) else ""
-
-
-def compact_excerpt(value: str, limit: int = 180) -> str:
-    text = " ".join(value.replace("\r", "\n").split())
-    return text[: limit - 1].rstrip() + "…" if len(text) > limit else text
+BUILDER = "scripts/import_legacy_social_style.py"
+THREADS_EXAMPLES = 8
 
 
 def resolve_source() -> Path:
@@ -27,33 +23,45 @@ def resolve_source() -> Path:
     return LOCAL_SOURCE
 
 
+def build_examples(rows: list[CorpusRow]) -> list[dict[str, str]]:
+    return [
+        {
+            "exampleId": row.example_id,
+            "signalId": row.signal_id,
+            "publishedAt": row.published_at,
+            "excerpt": row.compact(),
+        }
+        for row in rows
+    ]
+
+
 def load_examples(source_path: Path) -> list[dict[str, str]]:
-    data = json.loads(source_path.read_text(encoding="utf-8"))
-    rows: list[dict[str, str]] = []
-    for index, item in enumerate(data.get("published_content", []), start=1):
-        excerpt = as_text(item.get("instagram_caption_preview"))
-        if not excerpt:
-            continue
-        rows.append(
-            {
-                "exampleId": f"legacy-ig-{index:02d}",
-                "signalId": as_text(item.get("signal_id")),
-                "publishedAt": as_text(item.get("published_at")),
-                "excerpt": compact_excerpt(excerpt),
-            }
-        )
-    return rows
-
-
-def render_module(examples: list[dict[str, str]], source_path: Path) -> str:
+    return build_examples(load_rows(source_path))
+
+
+def select_threads(
+    rows: list[CorpusRow],
+    examples: list[dict[str, str]],
+    index: SimilarityIndex | None = None,
+) -> list[dict[str, str]]:
+    # Spread the Threads examples across the corpus instead of taking the first few by position.
+    index = SimilarityIndex.build(rows) if index is None else index
+    return [examples[position] for position in index.select_diverse(THREADS_EXAMPLES)]
+
+
+def render_module(
+    examples: list[dict[str, str]],
+    source_path: Path,
+    threads: list[dict[str, str]] | None = None,
+) -> str:
     payload = {
         "instagram": examples,
-        "threads": examples[:8],
+        "threads": examples[:THREADS_EXAMPLES] if threads is None else threads,
     }
     return (
         "// Generated from the repo-local social style snapshot.\n"
-        "// Builder: scripts/import_legacy_social_style.py\n"
-        f"// Source: {source_path}\n"
+        f"// Builder: {BUILDER}\n"
+        f"// Source: {manifest_key(source_path)}\n"
         f"export const socialStyleExamples = {json.dumps(payload, ensure_ascii=False, indent=2)};\n"
         "export default socialStyleExamples;\n"
     )
@@ -63,11 +71,14 @@ def main() -> None:
     source_path = resolve_source()
     if not source_path.exists():
         raise SystemExit(f"social style source missing: {source_path}")
-    examples = load_examples(source_path)
-    TARGET.write_text(render_module(examples, source_path), encoding="utf-8")
+    rows = load_rows(source_path)
+    examples = build_examples(rows)
+    threads = select_threads(rows, examples)
+    changed = publish_module(TARGET, render_module(examples, source_path, threads), source_path, BUILDER)
     print(f"examples={len(examples)}")
     print(f"source={source_path}")
     print(f"target={TARGET}")
+    print(f"changed={str(changed).lower()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST = ROOT / ".cache/social-style/manifest.json"
+PUBLISHED_DIR = ROOT / ".cache/social-style/published"
+CHUNK_SIZE = 1 << 16
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+WHITESPACE = " \t\r\n"
+DECODER = json.JSONDecoder()
+# Characters after a decoded value up to the next JSON delimiter; any at all means the value was cut short.
+VALUE_TAIL = re.compile(r"[^\s,:\]}]*")
+
+
+def as_text(value: object) -> str:
+    return value.strip() if isinstance(value, str) else ""
+
+
+def normalize_excerpt(value: str) -> str:
+    return " ".join(value.replace("\r", "\n").split())
+
+
+def compact_excerpt(normalized: str, limit: int = 180) -> str:
+    # Expects text that already went through normalize_excerpt.
+    return normalized[: limit - 1].rstrip() + "…" if len(normalized) > limit else normalized
+
+
+class JsonStream:
+    """Incremental reader over one top-level JSON object.
+
+    Only the value currently being decoded is held in memory, so a large
+    source file with many published_content entries is never loaded whole.
+    """
+
+    def __init__(self, handle, chunk_size: int = CHUNK_SIZE) -> None:
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, minimum: int = 0) -> bool:
+        if self.eof:
+            return False
+        if self.pos:
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+        chunk = self.handle.read(max(self.chunk_size, minimum))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r} in social style source, found {found or 'EOF'!r}")
+        self.pos += 1
+
+    def value(self) -> object:
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Grow geometrically so one oversized value stays linear to decode.
+                if not self.fill(len(self.buffer) - self.pos):
+                    raise
+                continue
+            # A scalar is only complete once a delimiter follows it: "1." or "1e"
+            # at the buffer edge decodes as 1 but may continue in the next chunk.
+            if VALUE_TAIL.match(self.buffer, end).end() == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("social style source object key must be a string")
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def items(self) -> Iterator[object]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+def is_ndjson(path: Path) -> bool:
+    return path.suffix.lower() in NDJSON_SUFFIXES
+
+
+def iter_ndjson_content(source_path: Path) -> Iterator[dict[str, object]]:
+    # One record per line. Lines carrying source_mode are batch headers written by the absorb step.
+    with source_path.open(encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"{source_path}:{line_number}: {exc}") from None
+            if isinstance(item, dict) and "source_mode" in item:
+                continue
+            yield item if isinstance(item, dict) else {}
+
+
+def iter_published_content(source_path: Path) -> Iterator[dict[str, object]]:
+    if is_ndjson(source_path):
+        yield from iter_ndjson_content(source_path)
+        return
+    with source_path.open(encoding="utf-8") as handle:
+        stream = JsonStream(handle)
+        for key in stream.members():
+            if key != "published_content":
+                stream.value()
+                continue
+            for item in stream.items():
+                yield item if isinstance(item, dict) else {}
+
+
+class CorpusRow:
+    """One caption from the source, kept small for long caption histories.
+
+    Signal ids are interned because a handful of them repeat across the
+    whole archive. The excerpt shares the caption string when normalizing
+    changes nothing. The example id and truncated views are derived when
+    asked for instead of being stored per row.
+    """
+
+    __slots__ = ("index", "signal_id", "published_at", "caption", "excerpt")
+
+    def __init__(self, index: int, signal_id: str, published_at: str, caption: str, excerpt: str | None = None) -> None:
+        self.index = index
+        self.signal_id = sys.intern(signal_id)
+        self.published_at = published_at
+        self.caption = caption
+        normalized = normalize_excerpt(caption) if excerpt is None else excerpt
+        self.excerpt = caption if normalized == caption else normalized
+
+    @property
+    def example_id(self) -> str:
+        return f"legacy-ig-{self.index:02d}"
+
+    def compact(self, limit: int = 180) -> str:
+        return compact_excerpt(self.excerpt, limit)
+
+    def preview(self, limit: int) -> str:
+        return self.excerpt[:limit] + "…" if len(self.excerpt) > limit else self.excerpt
+
+    def renumbered(self, index: int) -> CorpusRow:
+        return CorpusRow(index, self.signal_id, self.published_at, self.caption, self.excerpt)
+
+
+def iter_rows(source_path: Path) -> Iterator[CorpusRow]:
+    # example ids count every source entry, including the empty captions that are skipped.
+    for index, item in enumerate(iter_published_content(source_path), start=1):
+        caption = as_text(item.get("instagram_caption_preview"))
+        if not caption:
+            continue
+        yield CorpusRow(index, as_text(item.get("signal_id")), as_text(item.get("published_at")), caption)
+
+
+def load_rows(source_path: Path) -> list[CorpusRow]:
+    return list(iter_rows(source_path))
+
+
+def renumber_rows(rows: list[CorpusRow]) -> list[CorpusRow]:
+    # Matches reading the rows back from a snapshot that no longer has the skipped entries.
+    return [row.renumbered(index) for index, row in enumerate(rows, start=1)]
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_key(path: Path) -> str:
+    resolved = path.resolve()
+    return str(resolved.relative_to(ROOT)) if resolved.is_relative_to(ROOT) else str(resolved)
+
+
+def write_if_changed(target: Path, text: str | bytes) -> tuple[bool, str]:
+    # An identical rewrite would still bump mtime and invalidate the brand-home build cache.
+    data = text.encode("utf-8") if isinstance(text, str) else text
+    digest = hashlib.sha256(data).hexdigest()
+    if target.exists() and file_digest(target) == digest:
+        return False, digest
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_suffix(target.suffix + ".tmp")
+    temp_path.write_bytes(data)
+    temp_path.replace(target)
+    return True, digest
+
+
+def read_manifest(manifest: Path = MANIFEST) -> dict[str, dict[str, str]]:
+    try:
+        entries = json.loads(manifest.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+def record_manifest(
+    target: Path, digest: str, source_path: Path, builder: str, sidecar: bool = False, manifest: Path = MANIFEST
+) -> None:
+    entries = read_manifest(manifest)
+    entry: dict[str, object] = {
+        "sha256": digest,
+        "source": manifest_key(source_path),
+        "sourceSha256": file_digest(source_path),
+        "builder": builder,
+    }
+    if sidecar:
+        # Build-side files such as the vector and similarity sidecars are never pushed downstream.
+        entry["sidecar"] = True
+    key = manifest_key(target)
+    if entries.get(key) == entry:
+        return
+    entries[key] = entry
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = manifest.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(entries, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    temp_path.replace(manifest)
+
+
+def publish_module(target: Path, text: str | bytes, source_path: Path, builder: str, sidecar: bool = False) -> bool:
+    changed, digest = write_if_changed(target, text)
+    record_manifest(target, digest, source_path, builder, sidecar)
+    return changed
+
+
+def published_entries(manifest: Path = MANIFEST) -> dict[str, dict[str, str]]:
+    return {key: entry for key, entry in read_manifest(manifest).items() if not entry.get("sidecar")}
+
+
+def published_marker(consumer: str) -> Path:
+    return PUBLISHED_DIR / f"{consumer}.json"
+
+
+def changed_outputs(consumer: str, manifest: Path = MANIFEST) -> list[str]:
+    # Outputs whose sha256 differs from what `consumer` (deploy, cdn, ...) last pushed.
+    try:
+        published = json.loads(published_marker(consumer).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        published = {}
+    if not isinstance(published, dict):
+        published = {}
+    return sorted(key for key, entry in published_entries(manifest).items() if published.get(key) != entry.get("sha256"))
+
+
+def mark_published(consumer: str, manifest: Path = MANIFEST) -> int:
+    entries = {key: entry.get("sha256") for key, entry in published_entries(manifest).items()}
+    marker = published_marker(consumer)
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = marker.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(entries, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    temp_path.replace(marker)
+    return len(entries)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+
+from analyze_legacy_social_style import resolve_source
+from legacy_social_style_corpus import CorpusRow, load_rows, normalize_excerpt, publish_module
+
+
+ROOT = Path(__file__).resolve().parents[1]
+TARGET = ROOT / ".cache/social-style/similarity-index.bin"
+BUILDER = "scripts/legacy_social_style_similarity.py"
+MAGIC = b"LSSI1\0"
+SHINGLE_SIZE = 3
+SIGNATURE_SIZE = 64
+BANDS = 16
+EMPTY = (1 << 32) - 1
+BIN_SPAN = (1 << 32) // SIGNATURE_SIZE
+
+
+def resolve_target() -> Path:
+    explicit = os.getenv("SOCIAL_STYLE_SIMILARITY_INDEX")
+    if explicit:
+        return Path(explicit).expanduser()
+    return TARGET
+
+
+def shingles(text: str) -> set[str]:
+    compact = "".join(text.split())
+    if len(compact) <= SHINGLE_SIZE:
+        return {compact} if compact else set()
+    return {compact[start : start + SHINGLE_SIZE] for start in range(len(compact) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> array:
+    # One-permutation MinHash: every shingle is hashed once and lands in one of the bins, so
+    # signing a draft stays well under a millisecond. Empty bins borrow the next filled bin
+    # (rotation densification) to keep the Jaccard estimate usable on short text.
+    bins = [EMPTY] * SIGNATURE_SIZE
+    for shingle in shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+        slot, rank = value % SIGNATURE_SIZE, value // SIGNATURE_SIZE
+        if rank < bins[slot]:
+            bins[slot] = rank
+    filled = [slot for slot, rank in enumerate(bins) if rank != EMPTY]
+    if filled and len(filled) < SIGNATURE_SIZE:
+        for slot in range(SIGNATURE_SIZE):
+            if bins[slot] != EMPTY:
+                continue
+            for distance in range(1, SIGNATURE_SIZE):
+                donor = bins[(slot + distance) % SIGNATURE_SIZE]
+                if donor != EMPTY and donor < BIN_SPAN:
+                    bins[slot] = donor + distance * BIN_SPAN
+                    break
+    return array("I", bins)
+
+
+def similarity(left: array, right: array) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / SIGNATURE_SIZE
+
+
+class SimilarityIndex:
+    """MinHash signatures for every caption plus LSH band buckets over them.
+
+    A query only compares against rows that share at least one band with the
+    draft, and falls back to a full scan when that leaves fewer than k rows.
+    """
+
+    def __init__(self, rows: list[dict[str, str]], signatures: list[array]) -> None:
+        self.rows = rows
+        self.signatures = signatures
+        width = SIGNATURE_SIZE // BANDS
+        self.buckets: list[dict[bytes, list[int]]] = [{} for _ in range(BANDS)]
+        for position, row_signature in enumerate(signatures):
+            for band in range(BANDS):
+                key = row_signature[band * width : (band + 1) * width].tobytes()
+                self.buckets[band].setdefault(key, []).append(position)
+
+    @classmethod
+    def build(cls, rows: list[CorpusRow]) -> SimilarityIndex:
+        entries = [{"exampleId": row.example_id, "signalId": row.signal_id, "excerpt": row.compact()} for row in rows]
+        return cls(entries, [signature(row.excerpt) for row in rows])
+
+    def candidates(self, query: array) -> set[int]:
+        width = SIGNATURE_SIZE // BANDS
+        found: set[int] = set()
+        for band in range(BANDS):
+            found.update(self.buckets[band].get(query[band * width : (band + 1) * width].tobytes(), ()))
+        return found
+
+    def query(self, text: str, k: int = 5) -> list[dict[str, object]]:
+        query = signature(normalize_excerpt(text))
+        pool = self.candidates(query)
+        if len(pool) < k:
+            pool = set(range(len(self.signatures)))
+        scored = sorted(((similarity(query, self.signatures[position]), position) for position in pool), key=lambda item: (-item[0], item[1]))
+        return [{**self.rows[position], "similarity": round(score, 3)} for score, position in scored[:k]]
+
+    def select_diverse(self, count: int) -> list[int]:
+        # Start from the caption that collides with the most others (the densest region), then keep
+        # adding whichever caption is least similar to everything picked so far.
+        total = len(self.signatures)
+        if total <= count:
+            return list(range(total))
+        density = [0] * total
+        for band_buckets in self.buckets:
+            for members in band_buckets.values():
+                for position in members:
+                    density[position] += len(members) - 1
+        picked = [max(range(total), key=lambda position: (density[position], -position))]
+        closest = [similarity(self.signatures[picked[0]], row_signature) for row_signature in self.signatures]
+        while len(picked) < count:
+            chosen = min((position for position in range(total) if position not in picked), key=lambda position: (closest[position], position))
+            picked.append(chosen)
+            for position, row_signature in enumerate(self.signatures):
+                closest[position] = max(closest[position], similarity(self.signatures[chosen], row_signature))
+        return sorted(picked)
+
+    def encode(self) -> bytes:
+        header = {"shingleSize": SHINGLE_SIZE, "signatureSize": SIGNATURE_SIZE, "bands": BANDS, "rows": self.rows}
+        encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        flat = array("I")
+        for row_signature in self.signatures:
+            flat.extend(row_signature)
+        if sys.byteorder != "little":
+            flat.byteswap()
+        return MAGIC + struct.pack("<I", len(encoded)) + encoded + flat.tobytes()
+
+    @classmethod
+    def decode(cls, raw: bytes) -> SimilarityIndex:
+        if not raw.startswith(MAGIC):
+            raise ValueError("not a social style similarity index")
+        offset = len(MAGIC)
+        (header_length,) = struct.unpack_from("<I", raw, offset)
+        offset += 4
+        header = json.loads(raw[offset : offset + header_length].decode("utf-8"))
+        if (header["shingleSize"], header["signatureSize"], header["bands"]) != (SHINGLE_SIZE, SIGNATURE_SIZE, BANDS):
+            raise ValueError("similarity index was built with different parameters; rebuild it")
+        flat = array("I")
+        flat.frombytes(raw[offset + header_length :])
+        if sys.byteorder != "little":
+            flat.byteswap()
+        signatures = [flat[start : start + SIGNATURE_SIZE] for start in range(0, len(flat), SIGNATURE_SIZE)]
+        return cls(header["rows"], signatures)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query the social style similarity index.")
+    parser.add_argument("--query", help="draft text to match against past captions")
+    parser.add_argument("-k", type=int, default=5, help="number of neighbours to return")
+    args = parser.parse_args()
+    target = resolve_target()
+
+    if args.query is not None:
+        if not target.exists():
+            raise SystemExit(f"similarity index missing: {target} (run without --query first)")
+        index = SimilarityIndex.decode(target.read_bytes())
+        started = time.perf_counter()
+        matches = index.query(args.query, args.k)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps({"queryMs": round(elapsed_ms, 3), "matches": matches}, ensure_ascii=False, indent=2))
+        return
+
+    source_path = resolve_source()
+    if not source_path.exists():
+        raise SystemExit(f"social style source missing: {source_path}")
+    rows = load_rows(source_path)
+    index = SimilarityIndex.build(rows)
+    changed = publish_module(target, index.encode(), source_path, BUILDER, sidecar=True)
+    print(f"examples={len(rows)}")
+    print(f"target={target}")
+    print(f"changed={str(changed).lower()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+
+from legacy_social_style_corpus import MANIFEST, changed_outputs, mark_published
+
+
+UNCHANGED_EXIT = 3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gate downstream pushes on the social style output manifest.")
+    parser.add_argument("command", choices=("changed", "mark"), help="list outputs changed since the last push, or record a push")
+    parser.add_argument("--consumer", default="deploy", help="name of the downstream step, e.g. deploy or cdn (default: deploy)")
+    args = parser.parse_args()
+
+    if args.command == "mark":
+        print(f"published={mark_published(args.consumer)} consumer={args.consumer}")
+        return
+    if not MANIFEST.exists():
+        # Nothing has been recorded yet, so a push can't be proven redundant.
+        print(f"manifest_missing={MANIFEST}")
+        return
+    changed = changed_outputs(args.consumer)
+    for key in changed:
+        print(f"changed={key}")
+    print(f"changed_count={len(changed)} consumer={args.consumer}")
+    if not changed:
+        raise SystemExit(UNCHANGED_EXIT)
+
+
+if __name__ == "__main__":
+    main()
@@ -57,10 +57,18 @@ fi
 
 mkdir -p "$TARGET_DIR/objects"
 
+copied=0
 for rel in "${FILES[@]}"; do
+  # Identical files keep their mtime so the brand-home build cache stays valid.
+  if cmp -s "$SOURCE_DIR/$rel" "$TARGET_DIR/$rel"; then
+    echo "unchanged=$rel"
+    continue
+  fi
   mkdir -p "$(dirname "$TARGET_DIR/$rel")"
   cp "$SOURCE_DIR/$rel" "$TARGET_DIR/$rel"
   echo "copied=$rel"
+  copied=$((copied + 1))
 done
 
 printf 'synced=%s\n' "${#FILES[@]}"
+printf 'copied_count=%s\n' "$copied"
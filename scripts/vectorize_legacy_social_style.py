@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+
+from analyze_legacy_social_style import FeatureCache, open_feature_cache, resolve_source, synced_cache
+from legacy_social_style_corpus import CorpusRow, load_rows, publish_module
+
+try:
+    import numpy as np
+except ImportError:  # the stdlib path below produces the same sidecar, only slower
+    np = None
+
+
+ROOT = Path(__file__).resolve().parents[1]
+TARGET = ROOT / ".cache/social-style/style-vectors.bin"
+BUILDER = "scripts/vectorize_legacy_social_style.py"
+MAGIC = b"LSSV1\0"
+CHAR_NGRAMS = (2, 3)
+MIN_DOCUMENT_FREQUENCY = 2
+FINGERPRINT_TERMS = 12
+
+
+def resolve_target() -> Path:
+    explicit = os.getenv("SOCIAL_STYLE_VECTORS")
+    if explicit:
+        return Path(explicit).expanduser()
+    return TARGET
+
+
+def char_ngrams(excerpt: str) -> Counter[str]:
+    grams: Counter[str] = Counter()
+    for word in excerpt.split():
+        padded = f" {word} "
+        for size in CHAR_NGRAMS:
+            for start in range(len(padded) - size + 1):
+                grams[padded[start : start + size]] += 1
+    return grams
+
+
+class SparseBlock:
+    """One CSR matrix of L2-normalized TF-IDF weights plus its corpus centroid."""
+
+    def __init__(self, name: str, vocabulary: list[str], indptr: array, indices: array, data: array, centroid: array) -> None:
+        self.name = name
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.centroid = centroid
+
+    def row(self, position: int) -> dict[str, float]:
+        start, end = self.indptr[position], self.indptr[position + 1]
+        return {self.vocabulary[self.indices[i]]: self.data[i] for i in range(start, end)}
+
+    def top_terms(self, limit: int = FINGERPRINT_TERMS) -> list[dict[str, object]]:
+        ranked = sorted(range(len(self.centroid)), key=lambda index: (-self.centroid[index], index))[:limit]
+        return [{"term": self.vocabulary[index], "weight": round(self.centroid[index], 4)} for index in ranked]
+
+
+def build_block(name: str, counts: list[Counter[str]], min_df: int = MIN_DOCUMENT_FREQUENCY) -> SparseBlock:
+    document_frequency: Counter[str] = Counter()
+    for row_counts in counts:
+        document_frequency.update(row_counts.keys())
+    vocabulary = sorted(term for term, df in document_frequency.items() if df >= min_df)
+    column = {term: index for index, term in enumerate(vocabulary)}
+    total = len(counts)
+    # Smoothed idf, the same form scikit-learn uses by default.
+    idf = [math.log((1 + total) / (1 + document_frequency[term])) + 1 for term in vocabulary]
+
+    indptr = array("I", [0])
+    indices = array("I")
+    tf = array("f")
+    for row_counts in counts:
+        for index in sorted(column[term] for term in row_counts if term in column):
+            indices.append(index)
+            tf.append(row_counts[vocabulary[index]])
+        indptr.append(len(indices))
+
+    if np is not None:
+        data, centroid = weigh_numpy(indptr, indices, tf, idf, total, len(vocabulary))
+    else:
+        data, centroid = weigh_python(indptr, indices, tf, idf, total, len(vocabulary))
+    return SparseBlock(name, vocabulary, indptr, indices, data, centroid)
+
+
+def weigh_numpy(indptr: array, indices: array, tf: array, idf: list[float], rows: int, width: int) -> tuple[array, array]:
+    column = np.frombuffer(indices, dtype=np.uint32).astype(np.int64)
+    weights = np.frombuffer(tf, dtype=np.float32).astype(np.float64) * np.asarray(idf, dtype=np.float64)[column]
+    lengths = np.diff(np.frombuffer(indptr, dtype=np.uint32).astype(np.int64))
+    owner = np.repeat(np.arange(rows), lengths)
+    norms = np.sqrt(np.bincount(owner, weights=weights * weights, minlength=rows))
+    weights /= np.where(norms > 0, norms, 1.0)[owner]
+    centroid = np.bincount(column, weights=weights, minlength=width) / max(1, rows)
+    return array("f", weights.astype(np.float32).tobytes()), array("f", centroid.astype(np.float32).tobytes())
+
+
+def weigh_python(indptr: array, indices: array, tf: array, idf: list[float], rows: int, width: int) -> tuple[array, array]:
+    data = array("f")
+    centroid = [0.0] * width
+    for position in range(rows):
+        start, end = indptr[position], indptr[position + 1]
+        weights = [tf[i] * idf[indices[i]] for i in range(start, end)]
+        norm = math.sqrt(sum(weight * weight for weight in weights)) or 1.0
+        for i, weight in zip(range(start, end), weights):
+            data.append(weight / norm)
+            centroid[indices[i]] += weight / norm
+    return data, array("f", [value / max(1, rows) for value in centroid])
+
+
+def build_vectors(rows: list[CorpusRow], cache: FeatureCache | None = None) -> list[SparseBlock]:
+    # Word tokens come from the shared feature cache, so only the character grams need the raw text.
+    features = synced_cache(rows, cache).current
+    words = [Counter(row_features["tokens"]) for row_features in features]
+    chars = [char_ngrams(row.excerpt) for row in rows]
+    return [build_block("tfidf", words), build_block("char_ngrams", chars)]
+
+
+def fingerprint(blocks: list[SparseBlock]) -> dict[str, object]:
+    digest = hashlib.sha256()
+    for block in blocks:
+        digest.update(block.name.encode("utf-8"))
+        digest.update(block.centroid.tobytes())
+    return {
+        "sha256": digest.hexdigest(),
+        "blocks": {block.name: block.top_terms() for block in blocks},
+    }
+
+
+def encode_sidecar(rows: list[CorpusRow], blocks: list[SparseBlock]) -> bytes:
+    # Layout: magic, uint32 header length, JSON header, then per block the little-endian
+    # uint32 indptr, uint32 indices, float32 data and float32 centroid arrays back to back.
+    header = {
+        "rows": [row.example_id for row in rows],
+        "fingerprint": fingerprint(blocks),
+        "blocks": [
+            {"name": block.name, "vocabulary": block.vocabulary, "nnz": len(block.indices)}
+            for block in blocks
+        ],
+    }
+    encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    parts = [MAGIC, struct.pack("<I", len(encoded)), encoded]
+    for block in blocks:
+        for values in (block.indptr, block.indices, block.data, block.centroid):
+            if sys.byteorder != "little":
+                values = array(values.typecode, values)
+                values.byteswap()
+            parts.append(values.tobytes())
+    return b"".join(parts)
+
+
+def read_sidecar(path: Path) -> tuple[dict[str, object], list[SparseBlock]]:
+    raw = path.read_bytes()
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"not a social style vector sidecar: {path}")
+    offset = len(MAGIC)
+    (header_length,) = struct.unpack_from("<I", raw, offset)
+    offset += 4
+    header = json.loads(raw[offset : offset + header_length].decode("utf-8"))
+    offset += header_length
+    rows = len(header["rows"])
+    blocks: list[SparseBlock] = []
+    for spec in header["blocks"]:
+        arrays: list[array] = []
+        for typecode, count in (("I", rows + 1), ("I", spec["nnz"]), ("f", spec["nnz"]), ("f", len(spec["vocabulary"]))):
+            values = array(typecode)
+            values.frombytes(raw[offset : offset + count * values.itemsize])
+            if sys.byteorder != "little":
+                values.byteswap()
+            offset += count * values.itemsize
+            arrays.append(values)
+        blocks.append(SparseBlock(spec["name"], spec["vocabulary"], *arrays))
+    return header, blocks
+
+
+def main() -> None:
+    source_path = resolve_source()
+    if not source_path.exists():
+        raise SystemExit(f"social style source missing: {source_path}")
+    rows = load_rows(source_path)
+    cache = open_feature_cache()
+    blocks = build_vectors(rows, cache)
+    cache.save()
+    target = resolve_target()
+    changed = publish_module(target, encode_sidecar(rows, blocks), source_path, BUILDER, sidecar=True)
+    print(f"examples={len(rows)}")
+    print(f"backend={'numpy' if np is not None else 'stdlib'}")
+    for block in blocks:
+        print(f"{block.name}: features={len(block.vocabulary)} nnz={len(block.indices)}")
+    print(f"fingerprint={fingerprint(blocks)['sha256']}")
+    print(f"target={target}")
+    print(f"changed={str(changed).lower()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Encoders that stream a captured frame straight from the capture buffer to a file."""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from collections.abc import Iterator
+from typing import BinaryIO
+
+try:
+    from PIL import Image
+except ImportError:  # WebP is optional; png and ppm need only the stdlib
+    Image = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHUNK_SIZE = 1 << 16
+DEFAULT_COMPRESSION = 6
+
+
+class Frame:
+    """Pixels as the capture left them, described with Pillow raw mode names.
+
+    `data` may be a view into a shared-memory segment that the next capture
+    overwrites, so a frame has to be encoded before another one is taken.
+    """
+
+    def __init__(self, width: int, height: int, data: memoryview, stride: int, layout: str) -> None:
+        self.width = width
+        self.height = height
+        self.data = data
+        self.stride = stride
+        self.layout = layout
+        self.step = len(layout)
+
+    def rgb_rows(self) -> Iterator[bytes | bytearray | memoryview]:
+        # The same row buffer is refilled for every line; consumers must use it before asking for the next.
+        span = self.width * self.step
+        if self.layout == "RGB":
+            for y in range(self.height):
+                yield self.data[y * self.stride : y * self.stride + span]
+            return
+        red, green, blue = (self.layout.index(channel) for channel in "RGB")
+        row = bytearray(self.width * 3)
+        for y in range(self.height):
+            line = self.data[y * self.stride : y * self.stride + span]
+            row[0::3] = line[red :: self.step]
+            row[1::3] = line[green :: self.step]
+            row[2::3] = line[blue :: self.step]
+            yield row
+
+
+def png_chunk(kind: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(body, zlib.crc32(kind)) & 0xFFFFFFFF)
+
+
+def write_png(frame: Frame, handle: BinaryIO, compression: int = DEFAULT_COMPRESSION) -> None:
+    handle.write(PNG_SIGNATURE)
+    handle.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", frame.width, frame.height, 8, 2, 0, 0, 0)))
+    compressor = zlib.compressobj(compression)
+    pending: list[bytes] = []
+    size = 0
+    for row in frame.rgb_rows():
+        for piece in (compressor.compress(b"\0"), compressor.compress(row)):
+            if piece:
+                pending.append(piece)
+                size += len(piece)
+        if size >= PNG_CHUNK_SIZE:
+            handle.write(png_chunk(b"IDAT", b"".join(pending)))
+            pending, size = [], 0
+    pending.append(compressor.flush())
+    handle.write(png_chunk(b"IDAT", b"".join(pending)))
+    handle.write(png_chunk(b"IEND", b""))
+
+
+def write_ppm(frame: Frame, handle: BinaryIO) -> None:
+    # Binary PPM is the raw RGB rows behind a short header: no compression cost at all.
+    handle.write(f"P6\n{frame.width} {frame.height}\n255\n".encode("ascii"))
+    for row in frame.rgb_rows():
+        handle.write(row)
+
+
+def write_webp(frame: Frame, handle: BinaryIO, quality: int | None = None) -> None:
+    if Image is None:
+        raise RuntimeError("WebP output requires Pillow")
+    # Pillow unpacks the capture layout itself, so no RGB copy is made on this side.
+    image = Image.frombuffer("RGB", (frame.width, frame.height), frame.data, "raw", frame.layout, frame.stride, 1)
+    if quality is None:
+        image.save(handle, "WEBP", lossless=True)
+    else:
+        image.save(handle, "WEBP", quality=quality)
+
+
+def supported_formats() -> tuple[str, ...]:
+    return ("png", "ppm", "webp") if Image is not None else ("png", "ppm")
+
+
+def encode(frame: Frame, fmt: str, handle: BinaryIO, compression: int = DEFAULT_COMPRESSION, quality: int | None = None) -> None:
+    if fmt == "png":
+        write_png(frame, handle, compression)
+    elif fmt == "ppm":
+        write_ppm(frame, handle)
+    elif fmt == "webp":
+        write_webp(frame, handle, quality)
+    else:
+        raise ValueError(f"no in-process encoder for {fmt}")
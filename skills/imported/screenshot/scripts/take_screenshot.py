@@ -5,13 +5,24 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import hashlib
 import json
 import os
 import platform
+import shlex
 import shutil
 import subprocess
+import sys
 import tempfile
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import NoReturn
+
+from image_encoders import DEFAULT_COMPRESSION, encode, supported_formats
+from x11_capture import X11Capture, X11CaptureError
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 MAC_PERM_SCRIPT = SCRIPT_DIR / "macos_permissions.swift"
@@ -22,6 +33,13 @@ TEST_MODE_ENV = "CODEX_SCREENSHOT_TEST_MODE"
 TEST_PLATFORM_ENV = "CODEX_SCREENSHOT_TEST_PLATFORM"
 TEST_WINDOWS_ENV = "CODEX_SCREENSHOT_TEST_WINDOWS"
 TEST_DISPLAYS_ENV = "CODEX_SCREENSHOT_TEST_DISPLAYS"
+TEST_DELAY_ENV = "CODEX_SCREENSHOT_TEST_DELAY_MS"
+DEFAULT_JOBS = 4
+HELPER_CACHE_ENV = "CODEX_SCREENSHOT_HELPER_CACHE"
+SWIFTC_ENV = "CODEX_SCREENSHOT_SWIFTC"
+METADATA_TTL_ENV = "CODEX_SCREENSHOT_METADATA_TTL"
+DEFAULT_METADATA_TTL = 60.0
+BACKENDS = ("auto", "x11", "tools")
 TEST_PNG = (
     b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01"
     b"\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\x0cIDAT\x08\xd7c"
@@ -91,7 +109,19 @@ def test_display_ids() -> list[int]:
     return ids or [1]
 
 
+def test_delay_seconds() -> float:
+    value = os.environ.get(TEST_DELAY_ENV, "")
+    try:
+        return max(0.0, float(value)) / 1000 if value else 0.0
+    except ValueError:
+        return 0.0
+
+
 def write_test_png(path: Path) -> None:
+    # The optional delay stands in for screencapture latency so the scheduler can be timed anywhere.
+    delay = test_delay_seconds()
+    if delay:
+        time.sleep(delay)
     ensure_parent(path)
     path.write_bytes(TEST_PNG)
 
@@ -121,6 +151,7 @@ def mac_default_dir() -> Path:
     return desktop
 
 
+@lru_cache(maxsize=None)
 def default_dir(system: str) -> Path:
     home = Path.home()
     if system == "Darwin":
@@ -167,27 +198,58 @@ def resolve_output_path(
 
     if mode == "temp":
         tmp_dir = Path(tempfile.gettempdir())
-        tmp_path = tmp_dir / default_filename(fmt, prefix="codex-shot")
+        tmp_path = unique_path(tmp_dir / default_filename(fmt, prefix="codex-shot"))
         ensure_parent(tmp_path)
         return tmp_path
 
     dest_dir = default_dir(system)
-    dest_path = dest_dir / default_filename(fmt)
+    dest_path = unique_path(dest_dir / default_filename(fmt))
     ensure_parent(dest_path)
     return dest_path
 
 
+def unique_path(path: Path) -> Path:
+    # Timestamped names only have second resolution; repeated captures must not overwrite each other.
+    candidate = path
+    counter = 1
+    while candidate.exists():
+        candidate = path.with_name(f"{path.stem}-{counter}{path.suffix}")
+        counter += 1
+    return candidate
+
+
 def multi_output_paths(base: Path, suffixes: list[str]) -> list[Path]:
     if len(suffixes) <= 1:
         return [base]
     paths: list[Path] = []
     for suffix in suffixes:
-        candidate = base.with_name(f"{base.stem}-{suffix}{base.suffix}")
+        # The unsuffixed base is never written, so each variant needs its own uniqueness check.
+        candidate = unique_path(base.with_name(f"{base.stem}-{suffix}{base.suffix}"))
         ensure_parent(candidate)
         paths.append(candidate)
     return paths
 
 
+def run_captures(captures: list[tuple[Path, Callable[[], None]]], jobs: int) -> list[Path]:
+    """Run independent captures with at most `jobs` in flight and return paths in input order."""
+    if len(captures) <= 1 or jobs <= 1:
+        for _, capture in captures:
+            capture()
+        return [path for path, _ in captures]
+    failures: list[BaseException] = []
+    with ThreadPoolExecutor(max_workers=min(jobs, len(captures))) as pool:
+        futures = [pool.submit(capture) for _, capture in captures]
+        # Wait for every capture before reporting, so no screencapture process outlives the run.
+        for future in futures:
+            try:
+                future.result()
+            except (Exception, SystemExit) as exc:
+                failures.append(exc)
+    if failures:
+        raise failures[0]
+    return [path for path, _ in captures]
+
+
 def run(cmd: list[str]) -> None:
     try:
         subprocess.run(cmd, check=True)
@@ -197,10 +259,50 @@ def run(cmd: list[str]) -> None:
         raise SystemExit(f"command failed ({exc.returncode}): {' '.join(cmd)}") from exc
 
 
-def swift_json(script: Path, extra_args: list[str] | None = None) -> dict:
+def swift_module_cache() -> Path:
     module_cache = Path(tempfile.gettempdir()) / "codex-swift-module-cache"
     module_cache.mkdir(parents=True, exist_ok=True)
-    cmd = ["swift", "-module-cache-path", str(module_cache), str(script)]
+    return module_cache
+
+
+def helper_cache_dir() -> Path:
+    value = os.environ.get(HELPER_CACHE_ENV)
+    cache_dir = Path(value).expanduser() if value else Path(tempfile.gettempdir()) / "codex-swift-helper-cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def compiled_helper(script: Path) -> Path | None:
+    """Return a compiled binary for a Swift helper, building it once per script content.
+
+    Running `swift <script>` pays an interpreter cold start on every call; the binary
+    is keyed by the script hash so edits rebuild it. Returns None when no compiler is
+    available or the build fails, in which case callers fall back to the interpreter.
+    """
+    digest = hashlib.sha256(script.read_bytes()).hexdigest()[:16]
+    binary = helper_cache_dir() / f"{script.stem}-{digest}"
+    if binary.exists() and os.access(binary, os.X_OK):
+        return binary
+    swiftc = os.environ.get(SWIFTC_ENV) or shutil.which("swiftc")
+    if not swiftc:
+        return None
+    staging = binary.with_name(f"{binary.name}.{os.getpid()}.tmp")
+    cmd = [swiftc, "-O", "-module-cache-path", str(swift_module_cache()), str(script), "-o", str(staging)]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        os.replace(staging, binary)
+    except (OSError, subprocess.CalledProcessError):
+        staging.unlink(missing_ok=True)
+        return None
+    return binary
+
+
+def swift_json(script: Path, extra_args: list[str] | None = None) -> dict:
+    binary = compiled_helper(script)
+    if binary is not None:
+        cmd = [str(binary)]
+    else:
+        cmd = ["swift", "-module-cache-path", str(swift_module_cache()), str(script)]
     if extra_args:
         cmd.extend(extra_args)
     try:
@@ -221,10 +323,56 @@ def swift_json(script: Path, extra_args: list[str] | None = None) -> dict:
         raise SystemExit(f"swift helper returned invalid JSON: {proc.stdout.strip()}") from exc
 
 
+def metadata_ttl() -> float:
+    value = os.environ.get(METADATA_TTL_ENV, "")
+    try:
+        return float(value) if value else DEFAULT_METADATA_TTL
+    except ValueError:
+        return DEFAULT_METADATA_TTL
+
+
+def memoized(key: str, loader: Callable[[], object], keep: Callable[[object], bool] = lambda _: True) -> object:
+    """Serve `key` from the on-disk metadata file while it is younger than the TTL.
+
+    Each screenshot is a fresh process, so the memo lives next to the compiled
+    helpers rather than in memory. `keep` decides which results are worth storing.
+    """
+    ttl = metadata_ttl()
+    path = helper_cache_dir() / "metadata.json"
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        entries = {}
+    if not isinstance(entries, dict):
+        entries = {}
+    entry = entries.get(key)
+    now = time.time()
+    if ttl > 0 and isinstance(entry, dict) and 0 <= now - float(entry.get("at", 0)) < ttl:
+        return entry.get("value")
+    value = loader()
+    if ttl > 0 and keep(value):
+        entries[key] = {"at": now, "value": value}
+        staging = path.with_name(f"metadata.{os.getpid()}.tmp")
+        try:
+            staging.write_text(json.dumps(entries), encoding="utf-8")
+            os.replace(staging, path)
+        except OSError:
+            staging.unlink(missing_ok=True)
+    return value
+
+
 def macos_screen_capture_granted(request: bool = False) -> bool:
     args = ["--request"] if request else []
-    payload = swift_json(MAC_PERM_SCRIPT, args)
-    return bool(payload.get("screenCapture"))
+    if request:
+        return bool(swift_json(MAC_PERM_SCRIPT, args).get("screenCapture"))
+    # Only a granted state is remembered; a denial is re-checked so a fresh grant is seen at once.
+    return bool(
+        memoized(
+            "screenCapture",
+            lambda: bool(swift_json(MAC_PERM_SCRIPT, args).get("screenCapture")),
+            keep=bool,
+        )
+    )
 
 
 def ensure_macos_permissions() -> None:
@@ -261,8 +409,8 @@ def macos_window_payload(args: argparse.Namespace, frontmost: bool, include_list
 
 
 def macos_display_indexes() -> list[int]:
-    payload = swift_json(MAC_DISPLAY_SCRIPT)
-    displays = payload.get("displays") or []
+    payload = memoized("displays", lambda: swift_json(MAC_DISPLAY_SCRIPT))
+    displays = (payload.get("displays") or []) if isinstance(payload, dict) else []
     indexes: list[int] = []
     for item in displays:
         try:
@@ -366,11 +514,56 @@ def capture_macos(
     run(cmd)
 
 
+@lru_cache(maxsize=None)
+def linux_tools() -> dict[str, str | None]:
+    return {name: shutil.which(name) for name in ("scrot", "gnome-screenshot", "import", "xdotool")}
+
+
+@lru_cache(maxsize=1)
+def x11_session() -> X11Capture:
+    # One connection and shared-memory segment per process, reused by --burst and --serve.
+    return X11Capture()
+
+
+def close_x11_session() -> None:
+    if x11_session.cache_info().currsize:
+        x11_session().close()
+    x11_session.cache_clear()
+
+
+def capture_x11(args: argparse.Namespace, output: Path) -> None:
+    try:
+        frame = x11_session().capture_frame(args.region, args.window_id, args.active_window)
+    except OSError:
+        # A broken connection is dropped; protocol errors such as a bad window id leave it usable.
+        close_x11_session()
+        raise
+    # The frame still points at the capture buffer, so it is encoded straight into the output file.
+    with output.open("wb") as handle:
+        encode(frame, output.suffix.lower().lstrip("."), handle, args.compression, args.quality)
+
+
 def capture_linux(args: argparse.Namespace, output: Path) -> None:
-    scrot = shutil.which("scrot")
-    gnome = shutil.which("gnome-screenshot")
-    imagemagick = shutil.which("import")
-    xdotool = shutil.which("xdotool")
+    # The in-process path reads the window's rectangle of the root window, so anything covering the
+    # window shows up in the shot; under auto, `import -window` keeps capturing the window's own contents.
+    window_via_import = args.backend == "auto" and args.window_id is not None and linux_tools()["import"]
+    if args.backend != "tools" and not window_via_import:
+        if output.suffix.lower().lstrip(".") in supported_formats() and not args.interactive:
+            try:
+                capture_x11(args, output)
+                return
+            except (X11CaptureError, OSError) as exc:
+                if args.backend == "x11":
+                    raise SystemExit(f"x11 capture failed: {exc}") from exc
+        elif args.backend == "x11":
+            formats = "/".join(supported_formats())
+            raise SystemExit(f"--backend x11 only writes {formats} and does not support --interactive")
+
+    tools = linux_tools()
+    scrot = tools["scrot"]
+    gnome = tools["gnome-screenshot"]
+    imagemagick = tools["import"]
+    xdotool = tools["xdotool"]
 
     if args.region is not None:
         x, y, w, h = args.region
@@ -417,8 +610,25 @@ def capture_linux(args: argparse.Namespace, output: Path) -> None:
     raise SystemExit("no supported screenshot tool found (scrot, gnome-screenshot, or import)")
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description=__doc__)
+class RequestParser(argparse.ArgumentParser):
+    """Parser for --serve requests that raises instead of printing or exiting.
+
+    stdout carries exactly one JSON line per request, so usage errors and
+    --help must not write to it.
+    """
+
+    def error(self, message: str) -> NoReturn:
+        raise SystemExit(f"invalid request: {message}")
+
+    def exit(self, status: int = 0, message: str | None = None) -> NoReturn:
+        raise SystemExit(message.strip() if message else f"invalid request (exit {status})")
+
+    def print_help(self, file=None) -> None:
+        raise SystemExit("--help is not available inside serve requests")
+
+
+def build_parser(parser_class: type[argparse.ArgumentParser] = argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser = parser_class(description=__doc__)
     parser.add_argument(
         "--path",
         help="output file path or directory; overrides --mode",
@@ -432,7 +642,18 @@ def main() -> None:
     parser.add_argument(
         "--format",
         default="png",
-        help="image format/extension (default: png)",
+        help="image format/extension (default: png); the Linux x11 backend encodes png, ppm and, with Pillow, webp",
+    )
+    parser.add_argument(
+        "--compression",
+        type=int,
+        default=DEFAULT_COMPRESSION,
+        help=f"x11 backend: png zlib level 0-9, lower is faster and larger (default: {DEFAULT_COMPRESSION})",
+    )
+    parser.add_argument(
+        "--quality",
+        type=int,
+        help="x11 backend: lossy webp quality 1-100 (default: lossless)",
     )
     parser.add_argument(
         "--app",
@@ -467,7 +688,48 @@ def main() -> None:
         action="store_true",
         help="use interactive selection where the OS tool supports it",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="auto",
+        help=(
+            "Linux only: x11 reads the X server in-process, tools shells out to scrot/gnome-screenshot/import, "
+            "auto tries x11 first except for --window-id when import is available"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"maximum concurrent captures when several windows or displays match (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=1,
+        help="take N captures in a row, printing each path as soon as it is written",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="milliseconds between burst captures, measured from the start of each one (default: 0)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="read one set of capture options per stdin line and answer each with a JSON line",
+    )
+    return parser
+
+
+def validate_args(args: argparse.Namespace) -> None:
+    if args.jobs < 1:
+        raise SystemExit("--jobs must be at least 1")
+    if not 0 <= args.compression <= 9:
+        raise SystemExit("--compression must be between 0 and 9")
+    if args.quality is not None and not 1 <= args.quality <= 100:
+        raise SystemExit("--quality must be between 1 and 100")
 
     if args.region and args.window_id is not None:
         raise SystemExit("choose either --region or --window-id, not both")
@@ -492,12 +754,25 @@ def main() -> None:
     if args.list_windows and (args.region or args.window_id is not None or args.interactive):
         raise SystemExit("--list-windows only supports --app, --window-name, and --active-window")
 
-    test_mode = test_mode_enabled()
+    if args.burst < 1:
+        raise SystemExit("--burst must be at least 1")
+    if args.interval < 0:
+        raise SystemExit("--interval must not be negative")
+    if args.burst > 1 and (args.interactive or args.list_windows):
+        raise SystemExit("--burst cannot be combined with --interactive or --list-windows")
+
+
+def resolve_system(test_mode: bool) -> str:
     system = platform.system()
     if test_mode:
         override = test_platform_override()
         if override:
             system = override
+    return system
+
+
+def resolve_targets(args: argparse.Namespace, system: str, test_mode: bool) -> tuple[list[int], list[int]] | None:
+    """Return (window ids, display ids) to capture, or None after handling --list-windows."""
     window_ids: list[int] = []
     display_ids: list[int] = []
 
@@ -508,7 +783,7 @@ def main() -> None:
         if test_mode:
             if args.list_windows:
                 list_test_macos_windows(args)
-                return
+                return None
             if args.window_id is not None:
                 window_ids = [args.window_id]
             elif args.app or args.window_name or args.active_window:
@@ -519,55 +794,46 @@ def main() -> None:
             ensure_macos_permissions()
             if args.list_windows:
                 list_macos_windows(args)
-                return
+                return None
             if args.window_id is not None:
                 window_ids = [args.window_id]
             elif args.app or args.window_name or args.active_window:
                 window_ids = resolve_macos_windows(args)
             elif args.region is None and not args.interactive:
                 display_ids = macos_display_indexes()
+    return window_ids, display_ids
+
 
-    output = resolve_output_path(args.path, args.mode, args.format, system)
+def capture_to(
+    args: argparse.Namespace,
+    system: str,
+    test_mode: bool,
+    output: Path,
+    window_ids: list[int],
+    display_ids: list[int],
+) -> list[Path]:
+    targets: list[tuple[str, dict[str, int]]] = []
+    if system == "Darwin":
+        if window_ids:
+            targets = [(f"w{wid}", {"window_id": wid}) for wid in window_ids]
+        elif len(display_ids) > 1:
+            targets = [(f"d{did}", {"display": did}) for did in display_ids]
+
+    if targets:
+        paths = multi_output_paths(output, [suffix for suffix, _ in targets])
+        captures: list[tuple[Path, Callable[[], None]]] = []
+        for path, (_, target) in zip(paths, targets):
+            if test_mode:
+                captures.append((path, lambda path=path: write_test_png(path)))
+            else:
+                captures.append((path, lambda path=path, target=target: capture_macos(args, path, **target)))
+        return run_captures(captures, args.jobs)
 
     if test_mode:
-        if system == "Darwin":
-            if window_ids:
-                suffixes = [f"w{wid}" for wid in window_ids]
-                paths = multi_output_paths(output, suffixes)
-                for path in paths:
-                    write_test_png(path)
-                for path in paths:
-                    print(path)
-                return
-            if len(display_ids) > 1:
-                suffixes = [f"d{did}" for did in display_ids]
-                paths = multi_output_paths(output, suffixes)
-                for path in paths:
-                    write_test_png(path)
-                for path in paths:
-                    print(path)
-                return
         write_test_png(output)
-        print(output)
-        return
+        return [output]
 
     if system == "Darwin":
-        if window_ids:
-            suffixes = [f"w{wid}" for wid in window_ids]
-            paths = multi_output_paths(output, suffixes)
-            for wid, path in zip(window_ids, paths):
-                capture_macos(args, path, window_id=wid)
-            for path in paths:
-                print(path)
-            return
-        if len(display_ids) > 1:
-            suffixes = [f"d{did}" for did in display_ids]
-            paths = multi_output_paths(output, suffixes)
-            for did, path in zip(display_ids, paths):
-                capture_macos(args, path, display=did)
-            for path in paths:
-                print(path)
-            return
         capture_macos(args, output)
     elif system == "Linux":
         capture_linux(args, output)
@@ -577,8 +843,86 @@ def main() -> None:
         )
     else:
         raise SystemExit(f"unsupported platform: {system}")
+    return [output]
+
+
+def run_burst(args: argparse.Namespace, system: str, test_mode: bool, window_ids: list[int], display_ids: list[int]) -> None:
+    # Targets and the output location are resolved once; each shot only pays for the capture itself.
+    base = resolve_output_path(args.path, args.mode, args.format, system)
+    started = time.monotonic()
+    for index in range(args.burst):
+        if index:
+            wait = started + index * args.interval / 1000 - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        # Only the base was checked above; a second burst in the same second must not reuse its shot names.
+        output = unique_path(base.with_name(f"{base.stem}-{index + 1:03d}{base.suffix}"))
+        for path in capture_to(args, system, test_mode, output, window_ids, display_ids):
+            print(path, flush=True)
+
+
+def serve(system: str, test_mode: bool) -> None:
+    """Answer capture requests from stdin until EOF, one JSON line per request.
+
+    Each line holds the same options as the command line (for example
+    `--mode temp --region 0,0,400,300`). Tool discovery, the default output
+    directory and the macOS metadata memo stay warm across requests.
+    """
+    parser = build_parser(RequestParser)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            try:
+                argv = shlex.split(line)
+            except ValueError as exc:
+                raise SystemExit(f"invalid request: {exc}") from exc
+            args = parser.parse_args(argv)
+            validate_args(args)
+            if args.serve or args.burst > 1:
+                raise SystemExit("--serve and --burst are not available inside serve requests")
+            # Checked before resolving targets, which would print the window list to stdout.
+            if args.list_windows:
+                raise SystemExit("--list-windows is not available inside serve requests")
+            targets = resolve_targets(args, system, test_mode)
+            output = resolve_output_path(args.path, args.mode, args.format, system)
+            paths = capture_to(args, system, test_mode, output, *targets)
+            response: dict[str, object] = {"ok": True, "paths": [str(path) for path in paths]}
+        except SystemExit as exc:
+            response = {"ok": False, "error": exc.code if isinstance(exc.code, str) else "invalid request; see stderr"}
+        except Exception as exc:
+            # One failed capture must not take the server down with it.
+            response = {"ok": False, "error": f"capture failed: {exc}"}
+        print(json.dumps(response), flush=True)
+
+
+def main() -> None:
+    parser = build_parser()
+    args = parser.parse_args()
+    validate_args(args)
+
+    test_mode = test_mode_enabled()
+    system = resolve_system(test_mode)
+    try:
+        if args.serve:
+            serve(system, test_mode)
+            return
+
+        targets = resolve_targets(args, system, test_mode)
+        if targets is None:
+            return
+        window_ids, display_ids = targets
+        if args.burst > 1:
+            run_burst(args, system, test_mode, window_ids, display_ids)
+            return
 
-    print(output)
+        output = resolve_output_path(args.path, args.mode, args.format, system)
+        for path in capture_to(args, system, test_mode, output, window_ids, display_ids):
+            print(path)
+    finally:
+        # The shared-memory segment is detached explicitly rather than left to process teardown.
+        close_x11_session()
 
 
 if __name__ == "__main__":
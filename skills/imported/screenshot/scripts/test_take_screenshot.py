@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent / "take_screenshot.py"
+
+
+def serve(lines: list[str]) -> list[dict]:
+    env = dict(os.environ, CODEX_SCREENSHOT_TEST_MODE="1", CODEX_SCREENSHOT_TEST_PLATFORM="linux")
+    done = subprocess.run(
+        [sys.executable, str(SCRIPT), "--serve"],
+        input="".join(line + "\n" for line in lines),
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=60,
+        check=True,
+    )
+    return [json.loads(line) for line in done.stdout.splitlines()]
+
+
+class ServeTest(unittest.TestCase):
+    def test_bad_request_lines_do_not_stop_the_server(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            blocker = Path(tmp) / "file"
+            blocker.write_text("")
+            good = Path(tmp) / "shot.png"
+            responses = serve([
+                '--path "unbalanced',
+                "--no-such-flag",
+                f"--path {blocker / 'nested' / 'shot.png'}",
+                f"--path {good}",
+            ])
+        self.assertEqual(len(responses), 4)
+        for response in responses[:3]:
+            self.assertFalse(response["ok"])
+            self.assertTrue(response["error"])
+        self.assertEqual(responses[3], {"ok": True, "paths": [str(good)]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""In-process X11 screen capture that speaks the core protocol directly.
+
+Used by take_screenshot.py on Linux before falling back to scrot, gnome-screenshot
+or ImageMagick. Only the requested rectangle is read, with GetImage or, when the
+server is local, MIT-SHM ShmGetImage into a reusable shared-memory segment, and
+handed to image_encoders as a view over that buffer.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import socket
+import struct
+from pathlib import Path
+
+from image_encoders import Frame
+
+X_TRANSLATE_COORDINATES = 40
+X_GET_INPUT_FOCUS = 43
+X_GET_GEOMETRY = 14
+X_GET_IMAGE = 73
+X_QUERY_EXTENSION = 98
+SHM_ATTACH = 1
+SHM_DETACH = 2
+SHM_GET_IMAGE = 4
+Z_PIXMAP = 2
+ALL_PLANES = 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+COOKIE_NAME = b"MIT-MAGIC-COOKIE-1"
+
+
+class X11CaptureError(Exception):
+    """Raised when the X server cannot be reached or cannot serve the capture."""
+
+
+def pad4(length: int) -> int:
+    return (4 - length % 4) % 4
+
+
+def parse_display(value: str) -> tuple[str, int]:
+    host, _, rest = value.rpartition(":")
+    if not rest:
+        raise X11CaptureError(f"invalid DISPLAY: {value!r}")
+    number = rest.split(".", 1)[0]
+    try:
+        return host, int(number)
+    except ValueError as exc:
+        raise X11CaptureError(f"invalid DISPLAY: {value!r}") from exc
+
+
+def read_xauthority(number: int, local: bool) -> tuple[bytes, bytes]:
+    path = os.environ.get("XAUTHORITY") or str(Path.home() / ".Xauthority")
+    try:
+        raw = Path(path).read_bytes()
+    except OSError:
+        return b"", b""
+    hostname = socket.gethostname().encode()
+    offset = 0
+    fallback = (b"", b"")
+
+    def field() -> bytes:
+        nonlocal offset
+        (length,) = struct.unpack_from(">H", raw, offset)
+        value = raw[offset + 2 : offset + 2 + length]
+        offset += 2 + length
+        return value
+
+    try:
+        while offset < len(raw):
+            (family,) = struct.unpack_from(">H", raw, offset)
+            offset += 2
+            address, display, name, data = field(), field(), field(), field()
+            if name != COOKIE_NAME or (display and display != str(number).encode()):
+                continue
+            if family == 65535 or (local and family == 256 and address == hostname):
+                return name, data
+            if not local and fallback == (b"", b""):
+                fallback = (name, data)
+    except struct.error:
+        pass
+    return fallback
+
+
+class X11Connection:
+    """Minimal little-endian X11 client: setup, a few core requests and MIT-SHM."""
+
+    def __init__(self, display: str | None = None) -> None:
+        display = display if display is not None else os.environ.get("DISPLAY", "")
+        if not display:
+            raise X11CaptureError("DISPLAY is not set")
+        host, number = parse_display(display)
+        self.local = host in ("", "unix")
+        self.sock = self.connect(host, number)
+        self.sequence = 0
+        # Requests without a reply whose errors are collected for a later check().
+        self.checked: dict[int, str | None] = {}
+        self.setup(*read_xauthority(number, self.local))
+        self.next_id = 0
+
+    @staticmethod
+    def connect(host: str, number: int) -> socket.socket:
+        if host in ("", "unix"):
+            path = f"/tmp/.X11-unix/X{number}"
+            for address in ("\0" + path, path):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(address)
+                    return sock
+                except OSError:
+                    sock.close()
+            raise X11CaptureError(f"cannot connect to X server on {path}")
+        try:
+            sock = socket.create_connection((host, 6000 + number), timeout=5)
+        except OSError as exc:
+            raise X11CaptureError(f"cannot connect to X server at {host}:{number}") from exc
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def recv_exact(self, size: int) -> bytearray:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = self.sock.recv_into(view[received:])
+            if not count:
+                raise ConnectionError("X server closed the connection")
+            received += count
+        return buffer
+
+    def setup(self, auth_name: bytes, auth_data: bytes) -> None:
+        request = struct.pack("<BxHHHHxx", 0x6C, 11, 0, len(auth_name), len(auth_data))
+        request += auth_name + b"\0" * pad4(len(auth_name)) + auth_data + b"\0" * pad4(len(auth_data))
+        self.sock.sendall(request)
+        status, reason_length, _, _, length = struct.unpack("<BBHHH", self.recv_exact(8))
+        body = self.recv_exact(length * 4)
+        if status != 1:
+            reason = body[:reason_length] if status == 0 else body
+            raise X11CaptureError(f"X server refused connection: {reason.decode(errors='replace').strip()}")
+        (
+            _release,
+            self.id_base,
+            self.id_mask,
+            _motion,
+            vendor_length,
+            _max_request,
+            screen_count,
+            format_count,
+            self.image_byte_order,
+        ) = struct.unpack_from("<IIIIHHBBB", body, 0)
+        offset = 32 + vendor_length + pad4(vendor_length)
+        self.formats: dict[int, tuple[int, int]] = {}
+        for _ in range(format_count):
+            depth, bits_per_pixel, scanline_pad = struct.unpack_from("<BBB", body, offset)
+            self.formats[depth] = (bits_per_pixel, scanline_pad)
+            offset += 8
+        if screen_count < 1:
+            raise X11CaptureError("X server reported no screens")
+        (self.root, _, _, _, _, self.width, self.height, _, _, _, _, self.root_visual, _, _, _, depth_count) = struct.unpack_from(
+            "<IIIIIHHHHHHIBBBB", body, offset
+        )
+        offset += 40
+        self.visuals: dict[int, tuple[int, int, int]] = {}
+        for _ in range(depth_count):
+            _depth, visual_count = struct.unpack_from("<BxH4x", body, offset)
+            offset += 8
+            for _ in range(visual_count):
+                visual_id, _cls, _bits, _entries, red, green, blue = struct.unpack_from("<IBBHIII4x", body, offset)
+                self.visuals[visual_id] = (red, green, blue)
+                offset += 24
+
+    def allocate_id(self) -> int:
+        self.next_id += 1
+        return self.id_base | (self.next_id & self.id_mask)
+
+    def send(self, request: bytes) -> int:
+        self.sock.sendall(request)
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        return self.sequence
+
+    def send_checked(self, request: bytes) -> int:
+        sequence = self.send(request)
+        self.checked[sequence] = None
+        return sequence
+
+    def check(self, sequence: int) -> None:
+        """Raise the error a `send_checked` request produced, if any.
+
+        Errors arrive in request order, so once a later request has been
+        answered any error for `sequence` has already been read.
+        """
+        self.get_input_focus()
+        message = self.checked.pop(sequence, None)
+        if message is not None:
+            raise X11CaptureError(message)
+
+    def reply(self, sequence: int) -> tuple[bytearray, bytearray]:
+        while True:
+            header = self.recv_exact(32)
+            kind = header[0]
+            if kind == 0:
+                code, error_sequence, _value, minor, major = struct.unpack_from("<xBHIHB", header)
+                message = f"X11 error {code} for request {major}.{minor}"
+                if error_sequence == sequence:
+                    raise X11CaptureError(message)
+                if error_sequence in self.checked:
+                    self.checked[error_sequence] = message
+                continue
+            if kind == 1:
+                (length,) = struct.unpack_from("<I", header, 4)
+                extra = self.recv_exact(length * 4) if length else bytearray()
+                (reply_sequence,) = struct.unpack_from("<H", header, 2)
+                if reply_sequence == sequence:
+                    return header, extra
+                continue
+            # Events are never selected here, but a server may still send some; skip them.
+
+    def get_input_focus(self) -> int:
+        header, _ = self.reply(self.send(struct.pack("<BxH", X_GET_INPUT_FOCUS, 1)))
+        (focus,) = struct.unpack_from("<I", header, 8)
+        return focus
+
+    def get_geometry(self, drawable: int) -> tuple[int, int]:
+        header, _ = self.reply(self.send(struct.pack("<BxHI", X_GET_GEOMETRY, 2, drawable)))
+        width, height = struct.unpack_from("<HH", header, 16)
+        return width, height
+
+    def translate_to_root(self, window: int) -> tuple[int, int]:
+        request = struct.pack("<BxHIIhh", X_TRANSLATE_COORDINATES, 4, window, self.root, 0, 0)
+        header, _ = self.reply(self.send(request))
+        x, y = struct.unpack_from("<hh", header, 12)
+        return x, y
+
+    def query_extension(self, name: bytes) -> int | None:
+        request = struct.pack("<BxHHxx", X_QUERY_EXTENSION, 2 + (len(name) + pad4(len(name))) // 4, len(name))
+        header, _ = self.reply(self.send(request + name + b"\0" * pad4(len(name))))
+        present, opcode = header[8], header[9]
+        return opcode if present else None
+
+    def get_image(self, x: int, y: int, width: int, height: int) -> tuple[int, int, memoryview]:
+        request = struct.pack("<BBHIhhHHI", X_GET_IMAGE, Z_PIXMAP, 5, self.root, x, y, width, height, ALL_PLANES)
+        header, data = self.reply(self.send(request))
+        depth = header[1]
+        (visual,) = struct.unpack_from("<I", header, 8)
+        return depth, visual or self.root_visual, memoryview(data)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class SharedMemory:
+    """A SysV shared-memory segment the X server can write images into."""
+
+    def __init__(self, size: int) -> None:
+        name = ctypes.util.find_library("c")
+        if not name:
+            raise X11CaptureError("libc not found for MIT-SHM")
+        libc = ctypes.CDLL(name, use_errno=True)
+        libc.shmget.restype = ctypes.c_int
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+        self.libc = libc
+        self.size = size
+        self.id = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if self.id < 0:
+            raise X11CaptureError("shmget failed")
+        address = libc.shmat(self.id, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(self.id, IPC_RMID, None)
+            raise X11CaptureError("shmat failed")
+        self.address = address
+        self.view = memoryview((ctypes.c_char * size).from_address(address)).cast("B")
+
+    def release(self) -> None:
+        self.libc.shmctl(self.id, IPC_RMID, None)
+
+    def close(self) -> None:
+        self.view.release()
+        self.libc.shmdt(ctypes.c_void_p(self.address))
+
+
+class X11Capture:
+    """A capture session that keeps its connection and SHM segment between shots."""
+
+    def __init__(self, display: str | None = None, use_shm: bool = True) -> None:
+        self.conn = X11Connection(display)
+        self.shm: SharedMemory | None = None
+        self.shm_seg = 0
+        self.shm_opcode: int | None = None
+        if use_shm and self.conn.local:
+            try:
+                self.attach_shm()
+            except (X11CaptureError, OSError):
+                self.detach_shm()
+
+    def attach_shm(self) -> None:
+        opcode = self.conn.query_extension(b"MIT-SHM")
+        if opcode is None:
+            return
+        bits_per_pixel = self.conn.formats.get(24, (32, 32))[0]
+        shm = SharedMemory(self.conn.width * self.conn.height * max(4, bits_per_pixel // 8))
+        self.shm = shm
+        self.shm_seg = self.conn.allocate_id()
+        attach = self.conn.send_checked(struct.pack("<BBHIIB3x", opcode, SHM_ATTACH, 4, self.shm_seg, shm.id, 0))
+        # Round-trip so an attach error surfaces now; the segment can then be marked for removal.
+        self.conn.check(attach)
+        shm.release()
+        self.shm_opcode = opcode
+
+    def detach_shm(self) -> None:
+        if self.shm_opcode is not None:
+            try:
+                self.conn.send(struct.pack("<BBHI", self.shm_opcode, SHM_DETACH, 2, self.shm_seg))
+            except OSError:
+                pass
+        if self.shm is not None:
+            self.shm.release()
+            self.shm.close()
+        self.shm = None
+        self.shm_opcode = None
+
+    def grab(self, x: int, y: int, width: int, height: int) -> tuple[int, int, memoryview]:
+        if self.shm_opcode is not None and self.shm is not None:
+            request = struct.pack(
+                "<BBHIhhHHIB3xII",
+                self.shm_opcode,
+                SHM_GET_IMAGE,
+                8,
+                self.conn.root,
+                x,
+                y,
+                width,
+                height,
+                ALL_PLANES,
+                Z_PIXMAP,
+                self.shm_seg,
+                0,
+            )
+            try:
+                header, _ = self.conn.reply(self.conn.send(request))
+            except X11CaptureError:
+                # The server can't use the segment after all; drop SHM for the rest of the session.
+                self.detach_shm()
+            else:
+                depth = header[1]
+                visual, size = struct.unpack_from("<II", header, 8)
+                return depth, visual or self.conn.root_visual, self.shm.view[:size]
+        return self.conn.get_image(x, y, width, height)
+
+    def bounds(self, region: tuple[int, int, int, int] | None, window_id: int | None, active_window: bool) -> tuple[int, int, int, int]:
+        if active_window:
+            window_id = self.conn.get_input_focus()
+            if window_id in (0, 1):
+                raise X11CaptureError("no focused window to capture")
+        if window_id is not None:
+            width, height = self.conn.get_geometry(window_id)
+            x, y = self.conn.translate_to_root(window_id)
+            region = (x, y, width, height)
+        if region is None:
+            return 0, 0, self.conn.width, self.conn.height
+        x, y, width, height = region
+        left, top = max(0, x), max(0, y)
+        right, bottom = min(self.conn.width, x + width), min(self.conn.height, y + height)
+        if right <= left or bottom <= top:
+            raise X11CaptureError("capture area is outside the screen")
+        return left, top, right - left, bottom - top
+
+    def capture_frame(
+        self,
+        region: tuple[int, int, int, int] | None = None,
+        window_id: int | None = None,
+        active_window: bool = False,
+    ) -> Frame:
+        x, y, width, height = self.bounds(region, window_id, active_window)
+        depth, visual, data = self.grab(x, y, width, height)
+        bits_per_pixel, scanline_pad = self.conn.formats.get(depth, (32, 32))
+        masks = self.conn.visuals.get(visual, (0xFF0000, 0xFF00, 0xFF))
+        layout = pixel_layout(bits_per_pixel, masks, self.conn.image_byte_order)
+        stride = (width * bits_per_pixel + scanline_pad - 1) // scanline_pad * scanline_pad // 8
+        return Frame(width, height, data, stride, layout)
+
+    def close(self) -> None:
+        self.detach_shm()
+        self.conn.close()
+
+
+def pixel_layout(bits_per_pixel: int, masks: tuple[int, int, int], byte_order: int) -> str:
+    # LSBFirst servers store B,G,R(,X); MSBFirst ones store (X,)R,G,B.
+    if masks != (0xFF0000, 0xFF00, 0xFF) or bits_per_pixel not in (24, 32):
+        raise X11CaptureError(f"unsupported pixel layout: {bits_per_pixel} bpp, masks {masks}")
+    if bits_per_pixel == 32:
+        return "BGRX" if byte_order == 0 else "XRGB"
+    return "BGR" if byte_order == 0 else "RGB"